@@ -1,84 +1,609 @@
-import numpy as np
-import pandas as pd
-from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Optional
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error, r2_score
+import asyncio
+import itertools
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Tuple, Optional
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.cache import cache
 
-from .github_api import GitHubAPIService
+from asgiref.sync import sync_to_async
+
+from . import store
+from .github_api import (
+    COMMIT_WINDOW_DAYS, RESULT_FORBIDDEN, RESULT_NOT_FOUND, RepositoryStats, RepositoryUnavailable,
+    create_github_service, unwrap_stats,
+)
+from .rate_limit import PRIORITY_INTERACTIVE, RateLimitExceeded
+from .singleflight import AsyncSingleFlight, SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever scoring changes, so results computed by older code are not served
+ANALYSIS_VERSION = 2
+
+# Concurrent analyses of the same repository share one computation
+_inflight_analyses = SingleFlight()
+_inflight_async_analyses = AsyncSingleFlight()
+
+# Stale results are recomputed in the background while the old one is served
+_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='analysis-refresh')
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+# Why an analysis failed, in its ``reason``; analyses that were merely
+# ``unavailable`` or ``rate_limited`` are worth retrying later
+REASON_NOT_FOUND = 'not_found'
+REASON_FORBIDDEN = 'forbidden'
+REASON_UNAVAILABLE = 'unavailable'
+REASON_RATE_LIMITED = 'rate_limited'
+REASON_ERROR = 'error'
+
+# Reason and message of an analysis whose repository could not be read, by ``RepositoryUnavailable.status``
+UNAVAILABLE_ERRORS = {
+    RESULT_NOT_FOUND: (REASON_NOT_FOUND, 'Repository not found'),
+    RESULT_FORBIDDEN: (REASON_FORBIDDEN, 'Access to the repository is forbidden'),
+}
+TRANSIENT_ERROR = (REASON_UNAVAILABLE, 'GitHub is temporarily unavailable, try again later')
+
+# Weighted log score of a repository with 100k stars, 10k forks and 5k watchers
+MAX_POPULARITY_SCORE = math.log1p(100000) * 0.5 + math.log1p(10000) * 0.3 + math.log1p(5000) * 0.2
+
+# Share of each sub-score in the overall score
+OVERALL_WEIGHTS = {'popularity': 0.4, 'activity': 0.4, 'contribution': 0.2}
+
+# Points for each piece of contribution documentation (100 in total)
+CONTRIBUTION_WEIGHTS = {
+    'has_contributing_guide': 30,
+    'has_readme': 20,
+    'has_issue_templates': 15,
+    'has_pr_templates': 15,
+    'has_code_of_conduct': 10,
+    'has_license': 10,
+}
+
+# Files that make up a repository's contribution documentation
+GUIDE_FILES = [
+    'CONTRIBUTING.md', 'CONTRIBUTING.rst', 'CONTRIBUTING.txt',
+    'docs/CONTRIBUTING.md', 'docs/contributing.md',
+    '.github/CONTRIBUTING.md', '.github/contributing.md'
+]
+README_FILES = ['README.md', 'README.rst', 'README.txt']
+ISSUE_TEMPLATE_PATH = '.github/ISSUE_TEMPLATE'
+PR_TEMPLATE_PATH = '.github/pull_request_template.md'
+CODE_OF_CONDUCT_FILES = ['CODE_OF_CONDUCT.md', 'CODE_OF_CONDUCT.rst', '.github/CODE_OF_CONDUCT.md']
+LICENSE_FILES = ['LICENSE', 'LICENSE.md', 'LICENSE.txt', 'LICENCE', 'LICENCE.md']
+CONTRIBUTION_PATHS = (
+    GUIDE_FILES + README_FILES + [ISSUE_TEMPLATE_PATH, PR_TEMPLATE_PATH] +
+    CODE_OF_CONDUCT_FILES + LICENSE_FILES
+)
+
+
+def popularity_score(stars: int, forks: int, watchers: int) -> float:
+    """Popularity score (0-100) from log-scaled stars, forks and watchers"""
+    # Weighted scoring (stars are most important), normalized to 0-100
+    score = math.log1p(stars) * 0.5 + math.log1p(forks) * 0.3 + math.log1p(watchers) * 0.2
+    return round(min(100, (score / MAX_POPULARITY_SCORE) * 100), 2)
+
+
+def overall_score(popularity: float, activity: float, contribution: float,
+                  weights: Optional[Dict[str, float]] = None) -> float:
+    """Weighted average of the sub-scores (``OVERALL_WEIGHTS`` by default)"""
+    weights = weights or OVERALL_WEIGHTS
+    overall = (popularity * weights['popularity'] +
+               activity * weights['activity'] +
+               contribution * weights['contribution'])
+    return round(overall, 2)
+
+
+def activity_commit_count(activity: List[Dict], days: int, now: float) -> int:
+    """Commits of the last ``days`` days from GitHub's weekly commit activity
+    
+    Each week starts on Sunday 00:00 UTC (``week``) and holds one count per
+    day (``days``); a day is counted when it started within the window.
+    """
+    start = now - days * 86400
+    return sum(
+        count
+        for week in activity if week['week'] + 7 * 86400 > start
+        for index, count in enumerate(week['days']) if week['week'] + index * 86400 > start
+    )
+
+
+def recent_commit_count(repo_stats: Dict) -> int:
+    """Commits of the analyzed window, from the weekly activity once GitHub has computed it"""
+    activity = repo_stats.get('commit_activity')
+    if activity:
+        return activity_commit_count(activity, COMMIT_WINDOW_DAYS, time.time())
+    return len(repo_stats.get('recent_commits', []))
+
+
+def analysis_key(owner: str, repo: str) -> Tuple[str, str]:
+    """Identify a repository regardless of spelling (GitHub names are case-insensitive)"""
+    return owner.lower(), repo.lower()
+
+
+def result_cache_key(owner: str, repo: str) -> str:
+    """Cache key of a repository's analysis result for the current ``ANALYSIS_VERSION``"""
+    owner, repo = analysis_key(owner, repo)
+    return f"analysis:v{ANALYSIS_VERSION}:{owner}/{repo}"
+
+
+def is_stale(entry: Dict) -> bool:
+    """Whether a cached result is past ``ANALYZER_RESULT_SOFT_TTL`` and should be refreshed"""
+    return time.time() - entry['computed_at'] >= settings.ANALYZER_RESULT_SOFT_TTL
+
+
+def result_cache_entry(result: Dict) -> Dict:
+    """Wrap an analysis result with the time it was computed"""
+    return {'result': result, 'computed_at': time.time()}
+
+
+def result_cache_entries(results: List[Dict]) -> Dict[str, Dict]:
+    """Map the successful results among ``results`` to their cache keys and entries"""
+    return {
+        result_cache_key(result['owner'], result['repo_name']): result_cache_entry(result)
+        for result in results if 'error' not in result
+    }
+
+
+def remember_results(results: List[Dict]):
+    """Cache successful results and, when enabled, upsert them into the analysis store"""
+    entries = result_cache_entries(results)
+    if entries:
+        cache.set_many(entries, settings.ANALYZER_RESULT_HARD_TTL)
+        store.save_analyses(results, ANALYSIS_VERSION)
+
+
+async def aremember_results(results: List[Dict]):
+    """Async version of ``remember_results``"""
+    if store.is_enabled():
+        await sync_to_async(remember_results)(results)
+        return
+    entries = result_cache_entries(results)
+    if entries:
+        await cache.aset_many(entries, settings.ANALYZER_RESULT_HARD_TTL)
+
+
+def recall_result(owner: str, repo: str) -> Optional[Dict]:
+    """Return the cached result entry of a repository, falling back to the analysis store"""
+    key = result_cache_key(owner, repo)
+    entry = cache.get(key)
+    if entry is None and store.is_enabled():
+        stored = store.load_analysis(owner, repo, ANALYSIS_VERSION, settings.ANALYZER_RESULT_HARD_TTL)
+        if stored is not None:
+            result, analyzed_at = stored
+            entry = {'result': result, 'computed_at': analyzed_at.timestamp()}
+            cache.set(key, entry, settings.ANALYZER_RESULT_HARD_TTL)
+    return entry
+
+
+async def arecall_result(owner: str, repo: str) -> Optional[Dict]:
+    """Async version of ``recall_result``"""
+    entry = await cache.aget(result_cache_key(owner, repo))
+    if entry is None and store.is_enabled():
+        entry = await sync_to_async(recall_result)(owner, repo)
+    return entry
+
+
+def _claim_refresh(key: str) -> bool:
+    """Mark a background refresh of ``key`` as started; False if one is already running"""
+    with _refreshing_lock:
+        if key in _refreshing:
+            return False
+        _refreshing.add(key)
+        return True
+
+
+def _finish_refresh(key: str):
+    with _refreshing_lock:
+        _refreshing.discard(key)
+
+
+def unavailable_analysis(error: RepositoryUnavailable) -> Dict:
+    """Failed analysis of a repository that could not be read (missing, forbidden or transient)"""
+    reason, message = UNAVAILABLE_ERRORS.get(error.status, TRANSIENT_ERROR)
+    return {'error': message, 'reason': reason}
+
+
+def rate_limited_analysis(error: RateLimitExceeded) -> Dict:
+    """Failed analysis of a repository that ran out of rate limit"""
+    return {'error': str(error), 'reason': REASON_RATE_LIMITED, 'rate_limited': True}
+
+
+def analysis_entry(owner: str, repo: str, analysis: Optional[Dict], timeout: float) -> Dict:
+    """Describe the outcome of one repository of a comparison or batch (``analysis`` is None if it timed out)"""
+    entry = {'owner': owner, 'repo': repo, 'status': 'ok', 'analysis': None, 'error': None}
+    if analysis is None:
+        logger.warning(f"Timed out analyzing repository {owner}/{repo}")
+        entry.update(status='timeout', error=f'Analysis did not finish within {timeout:g} seconds')
+    elif 'error' not in analysis:
+        entry['analysis'] = analysis
+    else:
+        entry.update(status=analysis.get('reason', REASON_ERROR), error=analysis['error'])
+    return entry
+
+
+def dedupe_repositories(repositories: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """Drop repeated repositories, keeping the first spelling (GitHub names are case-insensitive)"""
+    seen = set()
+    unique = []
+    for owner, repo in repositories:
+        key = analysis_key(owner, repo)
+        if key not in seen:
+            seen.add(key)
+            unique.append((owner, repo))
+    return unique
+
+
+_analyzers: Dict[int, 'RepositoryAnalyzer'] = {}
+_analyzers_lock = threading.Lock()
+
+
+def get_analyzer(priority: int = PRIORITY_INTERACTIVE) -> 'RepositoryAnalyzer':
+    """Return the process-wide analyzer for ``priority``
+    
+    Analyzers hold no per-request state, so views, jobs and the refresher
+    share one per priority instead of building services on every request.
+    """
+    analyzer = _analyzers.get(priority)
+    if analyzer is None:
+        with _analyzers_lock:
+            analyzer = _analyzers.get(priority)
+            if analyzer is None:
+                analyzer = _analyzers[priority] = RepositoryAnalyzer(priority=priority)
+    return analyzer
+
+
+_popularity_model = None
+_popularity_model_loaded = False
+_popularity_model_lock = threading.Lock()
+
+
+def get_popularity_model():
+    """Return the newest trained popularity model under ``POPULARITY_MODEL_PATH``, or None
+    
+    The artifact is loaded once per process. NumPy is only imported when
+    an artifact exists, so deployments without a model keep a light start.
+    """
+    global _popularity_model, _popularity_model_loaded
+    if not _popularity_model_loaded:
+        with _popularity_model_lock:
+            if not _popularity_model_loaded:
+                if os.path.isdir(settings.POPULARITY_MODEL_PATH):
+                    from .popularity_model import load_latest
+                    try:
+                        _popularity_model = load_latest(settings.POPULARITY_MODEL_PATH)
+                    except (OSError, ValueError) as e:
+                        logger.error(f"Could not load popularity model: {e}")
+                _popularity_model_loaded = True
+    return _popularity_model
+
 
 class RepositoryAnalyzer:
     """Main analysis service for GitHub repositories"""
     
-    def __init__(self):
-        self.github_api = GitHubAPIService()
-        self.popularity_model = None
-        self.scaler = StandardScaler()
-        
-    def analyze_repository(self, owner: str, repo: str) -> Dict:
-        """Perform comprehensive repository analysis"""
+    def __init__(self, priority: int = PRIORITY_INTERACTIVE):
+        self.priority = priority
+        self.github_api = create_github_service(priority=priority)
+        self._async_github_api = None
+        
+    def analyze_repository(self, owner: str, repo: str, repo_stats: Optional[Dict] = None) -> Dict:
+        """Perform comprehensive repository analysis
+        
+        ``repo_stats`` may be passed when the data was already fetched.
+        Otherwise a cached (or, with the analysis
+        store enabled, stored) result is served: as-is
+        for ``ANALYZER_RESULT_SOFT_TTL`` seconds, then still served while a
+        background refresh replaces it, until it expires after
+        ``ANALYZER_RESULT_HARD_TTL``. Concurrent calls that miss the cache
+        share one analysis and receive the same result. A failed analysis
+        is an ``error`` message and the ``reason`` it failed (``REASON_*``).
+        """
+        if repo_stats is not None:
+            return self._analyze_repository(owner, repo, repo_stats)
+        
+        key = result_cache_key(owner, repo)
+        entry = recall_result(owner, repo)
+        if entry is not None:
+            if is_stale(entry) and _claim_refresh(key):
+                _refresh_executor.submit(self._refresh_in_background, key, owner, repo)
+            return entry['result']
+        return self.refresh_repository(owner, repo)
+    
+    def refresh_repository(self, owner: str, repo: str) -> Dict:
+        """Recompute and remember a repository's analysis, ignoring any cached result"""
+        return _inflight_analyses.do(analysis_key(owner, repo), self._analyze_repository, owner, repo)
+    
+    def _refresh_in_background(self, key: str, owner: str, repo: str):
+        try:
+            self.refresh_repository(owner, repo)
+        finally:
+            _finish_refresh(key)
+    
+    def _analyze_repository(self, owner: str, repo: str, repo_stats: Optional[Dict] = None,
+                            remember: bool = True) -> Dict:
+        """Fetch (unless given) and analyze one repository, remembering a successful result"""
         try:
             # Get repository data
-            repo_stats = self.github_api.get_repository_stats(owner, repo)
-            if not repo_stats:
-                return {'error': 'Repository not found or inaccessible'}
-            
-            basic_info = repo_stats['basic_info']
+            if repo_stats is None:
+                repo_stats = self.github_api.get_repository_stats(owner, repo)
             
-            # Perform individual analyses
-            popularity_analysis = self._analyze_popularity(basic_info, repo_stats)
-            maintainer_analysis = self._analyze_maintainer_activity(owner, repo, repo_stats)
-            contribution_analysis = self._analyze_contribution_guide(owner, repo)
+            result = self._build_analysis(owner, repo, repo_stats)
+            if remember:
+                remember_results([result])
+            return result
             
-            # Calculate overall score
-            overall_score = self._calculate_overall_score(
-                popularity_analysis['score'],
-                maintainer_analysis['score'],
-                contribution_analysis['score']
-            )
-            
-            # Generate recommendations
-            recommendations = self._generate_recommendations(
-                popularity_analysis, maintainer_analysis, contribution_analysis
-            )
+        except RepositoryUnavailable as e:
+            logger.warning(f"Could not read repository {owner}/{repo}: {e}")
+            return unavailable_analysis(e)
+        except RateLimitExceeded as e:
+            logger.warning(f"Rate limited while analyzing repository {owner}/{repo}: {e}")
+            return rate_limited_analysis(e)
+        except Exception as e:
+            logger.error(f"Error analyzing repository {owner}/{repo}: {e}")
+            return {'error': f'Analysis failed: {str(e)}', 'reason': REASON_ERROR}
+    
+    @property
+    def async_github_api(self):
+        """asyncio GitHub service, created on first use"""
+        if self._async_github_api is None:
+            from .github_async import create_async_github_service
+            self._async_github_api = create_async_github_service(priority=self.priority)
+        return self._async_github_api
+    
+    async def aanalyze_repositories(self, repositories: List[Tuple[str, str]], github_api=None) -> List[Dict]:
+        """Analyze several repositories, fetching their data with one ``get_repositories_stats`` call
+        
+        The GraphQL backend loads up to ``GITHUB_GRAPHQL_BATCH_SIZE``
+        repositories per query. Results are not looked up in the cache, but
+        are remembered together.
+        """
+        github_api = github_api or self.async_github_api
+        try:
+            all_stats = await github_api.get_repositories_stats(repositories)
+        except RateLimitExceeded as e:
+            logger.warning(f"Rate limited while fetching {len(repositories)} repositories: {e}")
+            return [rate_limited_analysis(e) for _ in repositories]
+        
+        analyses = list(await asyncio.gather(*(
+            self._aanalyze_repository(github_api, owner, repo, all_stats[(owner, repo)], remember=False)
+            for owner, repo in repositories
+        )))
+        await aremember_results(analyses)
+        return analyses
+    
+    async def acompare_repositories(self, repositories: List[Tuple[str, str]],
+                                    timeout: Optional[float] = None) -> List[Dict]:
+        """Analyze repositories concurrently for a comparison
+        
+        Duplicates are dropped and cached results served as they are. The
+        others are analyzed through ``aanalyze_repositories``, in groups of
+        as many repositories as the backend fetches in one round trip
+        (``stats_batch_size``): the GraphQL backend loads a whole comparison
+        with one query, REST analyzes each repository on its own. They share
+        one budget of ``ANALYZER_COMPARISON_MAX_IN_FLIGHT`` concurrent GitHub
+        requests and one deadline of ``timeout``
+        (``ANALYZER_COMPARISON_TIMEOUT``) seconds, so a comparison takes
+        about as long as its slowest group. Returns one entry per repository
+        with its ``status`` (``ok``, ``timeout`` or the ``reason`` the
+        analysis failed) and, when it succeeded, its ``analysis``. Groups still
+        running at the deadline are cancelled; GitHub requests they share
+        with other callers keep running and fill the cache.
+        """
+        timeout = settings.ANALYZER_COMPARISON_TIMEOUT if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        from .github_async import create_async_github_service
+        github_api = create_async_github_service(
+            priority=self.priority, max_in_flight=settings.ANALYZER_COMPARISON_MAX_IN_FLIGHT
+        )
+        
+        repositories = dedupe_repositories(repositories)
+        cached = await asyncio.gather(*(self._arecall_analysis(owner, repo) for owner, repo in repositories))
+        analyses = {repository: analysis for repository, analysis in zip(repositories, cached) if analysis}
+        misses = [repository for repository in repositories if repository not in analyses]
+        
+        size = github_api.stats_batch_size
+        groups = {
+            asyncio.ensure_future(self.aanalyze_repositories(misses[i:i + size], github_api)): misses[i:i + size]
+            for i in range(0, len(misses), size)
+        }
+        pending = set()
+        if groups:
+            _, pending = await asyncio.wait(groups, timeout=max(0, deadline - time.monotonic()))
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        for task, group in groups.items():
+            if task not in pending:
+                analyses.update(zip(group, task.result()))
+        
+        return [
+            analysis_entry(owner, repo, analyses.get((owner, repo)), timeout)
+            for owner, repo in repositories
+        ]
+    
+    async def astream_analyses(self, repositories: List[Tuple[str, str]],
+                               timeout: Optional[float] = None) -> AsyncIterator[Dict]:
+        """Analyze many repositories concurrently, yielding each entry as soon as it is ready
+        
+        At most ``ANALYZER_BATCH_CONCURRENCY`` repositories are analyzed at
+        once, sharing ``ANALYZER_COMPARISON_MAX_IN_FLIGHT`` concurrent GitHub
+        requests, so memory stays flat however long the batch is. Each
+        repository gets ``timeout`` (``ANALYZER_COMPARISON_TIMEOUT``) seconds.
+        Entries have the shape of ``acompare_repositories`` entries and come
+        in completion order; duplicates are dropped.
+        """
+        timeout = settings.ANALYZER_COMPARISON_TIMEOUT if timeout is None else timeout
+        concurrency = max(1, settings.ANALYZER_BATCH_CONCURRENCY)
+        from .github_async import create_async_github_service
+        github_api = create_async_github_service(
+            priority=self.priority, max_in_flight=settings.ANALYZER_COMPARISON_MAX_IN_FLIGHT
+        )
+        
+        waiting = iter(dedupe_repositories(repositories))
+        running = {}
+        
+        def start_more():
+            for owner, repo in itertools.islice(waiting, concurrency - len(running)):
+                task = asyncio.ensure_future(
+                    asyncio.wait_for(self._acached_analysis(github_api, owner, repo), timeout)
+                )
+                running[task] = (owner, repo)
+        
+        try:
+            start_more()
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                finished = [(running.pop(task), task) for task in done]
+                start_more()
+                for (owner, repo), task in finished:
+                    analysis = None if isinstance(task.exception(), asyncio.TimeoutError) else task.result()
+                    yield analysis_entry(owner, repo, analysis, timeout)
+        finally:
+            # The client went away or the caller stopped iterating
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+    
+    async def aanalyze_repository(self, owner: str, repo: str, repo_stats: Optional[Dict] = None) -> Dict:
+        """Async version of ``analyze_repository``
+        
+        Every GitHub call is awaited on the event loop, so no thread is held
+        while the analysis waits on the network.
+        """
+        if repo_stats is not None:
+            return await self._aanalyze_repository(self.async_github_api, owner, repo, repo_stats)
+        return await self._acached_analysis(self.async_github_api, owner, repo)
+    
+    async def _acached_analysis(self, github_api, owner: str, repo: str) -> Dict:
+        """Serve a cached result, refreshing it in the background once stale (see ``analyze_repository``)"""
+        result = await self._arecall_analysis(owner, repo)
+        if result is not None:
+            return result
+        return await self._ashared_analysis(github_api, owner, repo)
+    
+    async def _arecall_analysis(self, owner: str, repo: str) -> Optional[Dict]:
+        """Return a repository's cached result, if any, starting a background refresh once it is stale"""
+        key = result_cache_key(owner, repo)
+        entry = await arecall_result(owner, repo)
+        if entry is None:
+            return None
+        if is_stale(entry) and _claim_refresh(key):
+            # Off the request's loop, which may be gone before the refresh finishes
+            _refresh_executor.submit(self._refresh_in_background, key, owner, repo)
+        return entry['result']
+    
+    async def _ashared_analysis(self, github_api, owner: str, repo: str) -> Dict:
+        """Analyze a repository, joining an analysis of it already in progress"""
+        return await _inflight_async_analyses.do(
+            analysis_key(owner, repo), self._aanalyze_repository, github_api, owner, repo
+        )
+    
+    async def _aanalyze_repository(self, github_api, owner: str, repo: str,
+                                   repo_stats: Optional[RepositoryStats] = None, remember: bool = True) -> Dict:
+        """Run ``aanalyze_repository`` against the given asyncio GitHub service
+        
+        ``repo_stats`` may be a value of ``get_repositories_stats``.
+        """
+        try:
+            if repo_stats is None:
+                repo_stats = await github_api.get_repository_stats(owner, repo)
+            repo_stats = unwrap_stats(repo_stats)
             
-            return {
-                'owner': owner,
-                'repo_name': repo,
-                'full_name': basic_info['full_name'],
-                'description': basic_info.get('description', ''),
-                'stars': basic_info['stargazers_count'],
-                'forks': basic_info['forks_count'],
-                'watchers': basic_info['watchers_count'],
-                'open_issues': basic_info['open_issues_count'],
-                'open_pulls': len(repo_stats.get('pulls', [])),
-                'popularity_score': popularity_analysis['score'],
-                'maintainer_activity_score': maintainer_analysis['score'],
-                'contribution_guide_score': contribution_analysis['score'],
-                'overall_score': overall_score,
-                'popularity_prediction': popularity_analysis['prediction'],
-                'maintainer_activity_analysis': maintainer_analysis['analysis'],
-                'contribution_guide_analysis': contribution_analysis['analysis'],
-                'recommendations': recommendations,
-                'last_commit_date': basic_info['updated_at'],
-                'github_url': basic_info['html_url'],
-                'language': basic_info.get('language', 'Unknown'),
-                'topics': self.github_api.get_topics(owner, repo),
-                'languages': self.github_api.get_languages(owner, repo),
-                'releases_count': len(self.github_api.get_releases(owner, repo)),
-                'contributors_count': len(repo_stats.get('contributors', [])),
-                'recent_commits_count': len(repo_stats.get('recent_commits', []))
-            }
+            # Resolve everything _build_analysis would otherwise fetch synchronously
+            sample = repo_stats.get('issues', [])[:settings.ANALYZER_RESPONSE_SAMPLE_SIZE]
+            extra = await github_api.fetch_many({
+                'first_comments': (github_api.get_first_comment_times, sample),
+                'file_presence': (github_api.check_files_exist, owner, repo, CONTRIBUTION_PATHS,
+                                  repo_stats.get('tree')),
+            })
+            repo_stats = dict(repo_stats, **extra)
+            result = self._build_analysis(owner, repo, repo_stats)
+            if remember:
+                await aremember_results([result])
+            return result
             
+        except RepositoryUnavailable as e:
+            logger.warning(f"Could not read repository {owner}/{repo}: {e}")
+            return unavailable_analysis(e)
+        except RateLimitExceeded as e:
+            logger.warning(f"Rate limited while analyzing repository {owner}/{repo}: {e}")
+            return rate_limited_analysis(e)
         except Exception as e:
             logger.error(f"Error analyzing repository {owner}/{repo}: {e}")
-            return {'error': f'Analysis failed: {str(e)}'}
+            return {'error': f'Analysis failed: {str(e)}', 'reason': REASON_ERROR}
+    
+    def _build_analysis(self, owner: str, repo: str, repo_stats: Dict) -> Dict:
+        """Score fetched repository data and assemble the analysis result"""
+        basic_info = repo_stats['basic_info']
+        
+        # Perform individual analyses
+        popularity_analysis = self._analyze_popularity(basic_info, repo_stats)
+        maintainer_analysis = self._analyze_maintainer_activity(owner, repo, repo_stats)
+        contribution_analysis = self._analyze_contribution_guide(
+            owner, repo, repo_stats.get('tree'), repo_stats.get('file_presence')
+        )
+        
+        # A trained model, when available, replaces the rule-based growth prediction
+        predicted_growth = None
+        model = get_popularity_model()
+        if model is not None:
+            from .popularity_model import feature_row
+            predicted_growth = model.predict_one(feature_row(
+                basic_info['stargazers_count'], basic_info['forks_count'], basic_info['open_issues_count'],
+                maintainer_analysis['score'], contribution_analysis['score']
+            ))
+            popularity_analysis['prediction'] = model.describe(predicted_growth)
+        
+        # Calculate overall score
+        overall_score = self._calculate_overall_score(
+            popularity_analysis['score'],
+            maintainer_analysis['score'],
+            contribution_analysis['score']
+        )
+        
+        # Generate recommendations
+        recommendations = self._generate_recommendations(
+            popularity_analysis, maintainer_analysis, contribution_analysis
+        )
+        
+        return {
+            'owner': owner,
+            'repo_name': repo,
+            'full_name': basic_info['full_name'],
+            'description': basic_info.get('description', ''),
+            'stars': basic_info['stargazers_count'],
+            'forks': basic_info['forks_count'],
+            'watchers': basic_info['watchers_count'],
+            'open_issues': basic_info['open_issues_count'],
+            'open_pulls': repo_stats['counts']['open_pulls'],
+            'popularity_score': popularity_analysis['score'],
+            'maintainer_activity_score': maintainer_analysis['score'],
+            'contribution_guide_score': contribution_analysis['score'],
+            'overall_score': overall_score,
+            'popularity_prediction': popularity_analysis['prediction'],
+            'predicted_star_growth': predicted_growth,
+            'maintainer_activity_analysis': maintainer_analysis['analysis'],
+            'contribution_guide_analysis': contribution_analysis['analysis'],
+            'recommendations': recommendations,
+            'last_commit_date': basic_info['updated_at'],
+            'github_url': basic_info['html_url'],
+            'language': basic_info.get('language', 'Unknown'),
+            'topics': repo_stats.get('topics', []),
+            'languages': repo_stats.get('languages', {}),
+            'releases_count': repo_stats['counts']['releases'],
+            'contributors_count': repo_stats['counts']['contributors'],
+            'recent_commits_count': recent_commit_count(repo_stats),
+            # Inputs of the activity and contribution scores, for rescoring in bulk (see scoring.py)
+            'metrics': dict(maintainer_analysis['metrics'], **contribution_analysis['metrics'])
+        }
     
     def _analyze_popularity(self, basic_info: Dict, repo_stats: Dict) -> Dict:
         """Analyze repository popularity and predict future growth"""
@@ -106,26 +631,14 @@ class RepositoryAnalyzer:
     
     def _calculate_popularity_score(self, stars: int, forks: int, watchers: int, issues: int) -> float:
         """Calculate popularity score based on repository metrics"""
-        # Normalize metrics (log scale to handle large variations)
-        log_stars = np.log1p(stars)
-        log_forks = np.log1p(forks)
-        log_watchers = np.log1p(watchers)
-        
-        # Weighted scoring (stars are most important)
-        score = (log_stars * 0.5 + log_forks * 0.3 + log_watchers * 0.2)
-        
-        # Normalize to 0-100 scale
-        max_score = np.log1p(100000) * 0.5 + np.log1p(10000) * 0.3 + np.log1p(5000) * 0.2
-        normalized_score = min(100, (score / max_score) * 100)
-        
-        return round(normalized_score, 2)
+        return popularity_score(stars, forks, watchers)
     
     def _predict_popularity_growth(self, basic_info: Dict, repo_stats: Dict) -> str:
         """Predict future popularity growth"""
         stars = basic_info['stargazers_count']
         forks = basic_info['forks_count']
-        recent_commits = len(repo_stats.get('recent_commits', []))
-        contributors = len(repo_stats.get('contributors', []))
+        recent_commits = recent_commit_count(repo_stats)
+        contributors = repo_stats['counts']['contributors']
         
         # Simple prediction logic based on current metrics
         if stars > 1000 and forks > 100:
@@ -146,28 +659,37 @@ class RepositoryAnalyzer:
     
     def _analyze_maintainer_activity(self, owner: str, repo: str, repo_stats: Dict) -> Dict:
         """Analyze maintainer activity level"""
-        recent_commits = repo_stats.get('recent_commits', [])
+        activity = repo_stats.get('commit_activity')
         issues = repo_stats.get('issues', [])
-        pulls = repo_stats.get('pulls', [])
-        
-        # Calculate activity metrics
-        commits_last_30_days = len([c for c in recent_commits 
-                                   if self._is_within_days(c['commit']['author']['date'], 30)])
-        commits_last_7_days = len([c for c in recent_commits 
-                                  if self._is_within_days(c['commit']['author']['date'], 7)])
+        open_issues = repo_stats['counts']['open_issues']
+        open_pulls = repo_stats['counts']['open_pulls']
+        
+        # Calculate activity metrics, from the weekly activity when GitHub has computed it
+        now = time.time()
+        commits_last_year = None
+        if activity:
+            commits_last_30_days = activity_commit_count(activity, 30, now)
+            commits_last_7_days = activity_commit_count(activity, 7, now)
+            commits_last_year = sum(week['total'] for week in activity)
+        else:
+            commit_times = self._commit_timestamps(repo_stats.get('recent_commits', []))
+            commits_last_30_days = sum(1 for moment in commit_times if moment > now - 30 * 86400)
+            commits_last_7_days = sum(1 for moment in commit_times if moment > now - 7 * 86400)
         
         # Response time to issues (sample)
-        issue_response_times = self._calculate_response_times(issues)
-        avg_response_time = np.mean(issue_response_times) if issue_response_times else float('inf')
+        issue_response_times = self._calculate_response_times(issues, repo_stats.get('first_comments'))
+        avg_response_time = (
+            sum(issue_response_times) / len(issue_response_times) if issue_response_times else float('inf')
+        )
         
         # Activity score calculation
         activity_score = self._calculate_activity_score(
-            commits_last_30_days, commits_last_7_days, avg_response_time, len(issues), len(pulls)
+            commits_last_30_days, commits_last_7_days, avg_response_time, open_issues, open_pulls
         )
         
         # Generate analysis
         analysis = self._generate_activity_analysis(
-            commits_last_30_days, commits_last_7_days, avg_response_time, len(issues), len(pulls)
+            commits_last_30_days, commits_last_7_days, avg_response_time, open_issues, open_pulls
         )
         
         return {
@@ -176,33 +698,39 @@ class RepositoryAnalyzer:
             'metrics': {
                 'commits_30_days': commits_last_30_days,
                 'commits_7_days': commits_last_7_days,
+                'commits_last_year': commits_last_year,
                 'avg_response_time_hours': avg_response_time if avg_response_time != float('inf') else None,
-                'open_issues': len(issues),
-                'open_pulls': len(pulls)
+                'open_issues': open_issues,
+                'open_pulls': open_pulls
             }
         }
     
-    def _is_within_days(self, date_str: str, days: int) -> bool:
-        """Check if a date is within the last N days"""
-        try:
-            date = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-            return date > datetime.now(date.tzinfo) - timedelta(days=days)
-        except:
-            return False
+    def _commit_timestamps(self, commits: List[Dict]) -> List[float]:
+        """Parse the author date of each commit once (unparseable dates are skipped)"""
+        timestamps = []
+        for commit in commits:
+            try:
+                date = datetime.fromisoformat(commit['commit']['author']['date'].replace('Z', '+00:00'))
+            except (KeyError, TypeError, AttributeError, ValueError):
+                continue
+            timestamps.append(date.timestamp())
+        return timestamps
     
-    def _calculate_response_times(self, issues: List[Dict]) -> List[float]:
+    def _calculate_response_times(self, issues: List[Dict],
+                                  first_comments: Optional[Dict[int, Optional[str]]] = None) -> List[float]:
         """Calculate response times to issues in hours"""
         response_times = []
-        for issue in issues[:10]:  # Sample first 10 issues
-            if issue.get('comments', 0) > 0:
-                # Use first comment as response
-                comments = self.github_api._make_request(issue['comments_url'])
-                if comments:
-                    first_comment = comments[0]
-                    created = datetime.fromisoformat(issue['created_at'].replace('Z', '+00:00'))
-                    responded = datetime.fromisoformat(first_comment['created_at'].replace('Z', '+00:00'))
-                    response_time = (responded - created).total_seconds() / 3600  # hours
-                    response_times.append(response_time)
+        sample = issues[:settings.ANALYZER_RESPONSE_SAMPLE_SIZE]
+        if first_comments is None:
+            first_comments = self.github_api.get_first_comment_times(sample)
+        for issue in sample:
+            # Use first comment as response
+            first_comment_at = first_comments.get(issue['number'])
+            if first_comment_at:
+                created = datetime.fromisoformat(issue['created_at'].replace('Z', '+00:00'))
+                responded = datetime.fromisoformat(first_comment_at.replace('Z', '+00:00'))
+                response_time = (responded - created).total_seconds() / 3600  # hours
+                response_times.append(response_time)
         return response_times
     
     def _calculate_activity_score(self, commits_30: int, commits_7: int, 
@@ -252,55 +780,53 @@ class RepositoryAnalyzer:
                f"Recent commits: {commits_30} (30 days), {commits_7} (7 days). " \
                f"Open issues: {issues}, Open PRs: {pulls}."
     
-    def _analyze_contribution_guide(self, owner: str, repo: str) -> Dict:
-        """Analyze contribution guide quality"""
-        # Check for common contribution guide files
-        guide_files = [
-            'CONTRIBUTING.md', 'CONTRIBUTING.rst', 'CONTRIBUTING.txt',
-            'docs/CONTRIBUTING.md', 'docs/contributing.md',
-            '.github/CONTRIBUTING.md', '.github/contributing.md'
-        ]
-        
-        readme_files = ['README.md', 'README.rst', 'README.txt']
+    def _analyze_contribution_guide(self, owner: str, repo: str, tree=None,
+                                    present: Optional[Dict[str, bool]] = None) -> Dict:
+        """Analyze contribution guide quality
+        
+        ``present`` may carry an already resolved presence map for
+        ``CONTRIBUTION_PATHS``; otherwise it is answered from ``tree``.
+        """
+        guide_files = GUIDE_FILES
+        readme_files = README_FILES
+        issue_template_path = ISSUE_TEMPLATE_PATH
+        pr_template_path = PR_TEMPLATE_PATH
+        code_of_conduct_files = CODE_OF_CONDUCT_FILES
+        license_files = LICENSE_FILES
+        
+        # Answer every candidate path from the repository tree index
+        if present is None:
+            present = self.github_api.check_files_exist(owner, repo, CONTRIBUTION_PATHS, tree)
         
         # Check for contribution guide
-        has_contributing_guide = any(
-            self.github_api.check_file_exists(owner, repo, file) 
-            for file in guide_files
-        )
+        has_contributing_guide = any(present[file] for file in guide_files)
         
         # Check for README
-        has_readme = any(
-            self.github_api.check_file_exists(owner, repo, file) 
-            for file in readme_files
-        )
+        has_readme = any(present[file] for file in readme_files)
         
         # Check for issue templates
-        has_issue_templates = self.github_api.check_file_exists(owner, repo, '.github/ISSUE_TEMPLATE')
+        has_issue_templates = present[issue_template_path]
         
         # Check for PR templates
-        has_pr_templates = self.github_api.check_file_exists(owner, repo, '.github/pull_request_template.md')
+        has_pr_templates = present[pr_template_path]
         
         # Check for code of conduct
-        has_code_of_conduct = any(
-            self.github_api.check_file_exists(owner, repo, file)
-            for file in ['CODE_OF_CONDUCT.md', 'CODE_OF_CONDUCT.rst', '.github/CODE_OF_CONDUCT.md']
-        )
+        has_code_of_conduct = any(present[file] for file in code_of_conduct_files)
         
         # Check for license
-        has_license = any(
-            self.github_api.check_file_exists(owner, repo, file)
-            for file in ['LICENSE', 'LICENSE.md', 'LICENSE.txt', 'LICENCE', 'LICENCE.md']
-        )
+        has_license = any(present[file] for file in license_files)
+        
+        metrics = {
+            'has_contributing_guide': has_contributing_guide,
+            'has_readme': has_readme,
+            'has_issue_templates': has_issue_templates,
+            'has_pr_templates': has_pr_templates,
+            'has_code_of_conduct': has_code_of_conduct,
+            'has_license': has_license
+        }
         
         # Calculate score
-        score = 0
-        score += 30 if has_contributing_guide else 0
-        score += 20 if has_readme else 0
-        score += 15 if has_issue_templates else 0
-        score += 15 if has_pr_templates else 0
-        score += 10 if has_code_of_conduct else 0
-        score += 10 if has_license else 0
+        score = sum(points for name, points in CONTRIBUTION_WEIGHTS.items() if metrics[name])
         
         # Generate analysis
         analysis = self._generate_contribution_analysis(
@@ -311,14 +837,7 @@ class RepositoryAnalyzer:
         return {
             'score': score,
             'analysis': analysis,
-            'metrics': {
-                'has_contributing_guide': has_contributing_guide,
-                'has_readme': has_readme,
-                'has_issue_templates': has_issue_templates,
-                'has_pr_templates': has_pr_templates,
-                'has_code_of_conduct': has_code_of_conduct,
-                'has_license': has_license
-            }
+            'metrics': metrics
         }
     
     def _generate_contribution_analysis(self, has_contributing: bool, has_readme: bool,
@@ -358,12 +877,7 @@ class RepositoryAnalyzer:
     
     def _calculate_overall_score(self, popularity: float, activity: float, contribution: float) -> float:
         """Calculate overall repository score"""
-        # Weighted average
-        weights = {'popularity': 0.4, 'activity': 0.4, 'contribution': 0.2}
-        overall = (popularity * weights['popularity'] + 
-                  activity * weights['activity'] + 
-                  contribution * weights['contribution'])
-        return round(overall, 2)
+        return overall_score(popularity, activity, contribution)
     
     def _generate_recommendations(self, popularity: Dict, activity: Dict, contribution: Dict) -> List[str]:
         """Generate actionable recommendations"""
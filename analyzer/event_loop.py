@@ -0,0 +1,114 @@
+import asyncio
+import atexit
+import concurrent.futures
+import contextvars
+import os
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, List, Optional
+
+from asgiref.sync import ThreadSensitiveContext
+
+_loop = None
+_loop_pid = None
+_loop_lock = threading.Lock()
+
+# Coroutine functions run on the loop when the process exits (e.g. closing pooled clients)
+_shutdown_callbacks: List[Callable[[], Awaitable]] = []
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Return the process-wide event loop the async analysis pipeline runs on
+
+    The loop runs forever in a daemon thread started on first use (and
+    again in a forked child), so connection pools and background tasks
+    bound to it outlive the request that created them. Under ASGI views
+    await the pipeline on the server's own loop; this one serves WSGI
+    requests and background threads (jobs, refreshes).
+    """
+    global _loop, _loop_pid
+    if _loop is None or _loop_pid != os.getpid():
+        with _loop_lock:
+            if _loop is None or _loop_pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='analyzer-event-loop', daemon=True).start()
+                _loop, _loop_pid = loop, os.getpid()
+    return _loop
+
+
+def is_process_loop(loop: asyncio.AbstractEventLoop) -> bool:
+    """Whether ``loop`` is this process's long-lived loop"""
+    return loop is _loop and _loop_pid == os.getpid()
+
+
+async def with_own_thread(awaitable: Awaitable) -> Any:
+    """Await ``awaitable`` with a sync_to_async worker thread of its own
+    
+    Thread-sensitive ``sync_to_async`` calls (such as Django's async cache
+    API) otherwise share one thread per process, or go back to a request
+    thread that may be blocked waiting for this very coroutine. Must be
+    started from a context without a ``ThreadSensitiveContext`` (see
+    ``detached``), or the caller's one is reused.
+    """
+    async with ThreadSensitiveContext():
+        return await awaitable
+
+
+def detached(function: Callable, *args) -> Any:
+    """Call ``function(*args)`` outside the caller's context variables
+    
+    Tasks copy the context they are created in; scheduling them from an
+    empty one keeps them off the caller's thread-sensitive executor.
+    """
+    return contextvars.Context().run(function, *args)
+
+
+def submit(coroutine: Awaitable) -> concurrent.futures.Future:
+    """Schedule a coroutine on the process-wide loop, with its own sync_to_async thread"""
+    return detached(asyncio.run_coroutine_threadsafe, with_own_thread(coroutine), get_event_loop())
+
+
+def run(coroutine: Awaitable, timeout: Optional[float] = None) -> Any:
+    """Run a coroutine on the process-wide loop from synchronous code and return its result"""
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is not None and is_process_loop(running):
+        raise RuntimeError('event_loop.run() would block the loop it waits on; await the coroutine instead')
+    return submit(coroutine).result(timeout)
+
+
+def iterate(generator: AsyncIterator) -> Iterator:
+    """Drive an async generator on the process-wide loop, yielding its items to synchronous code
+
+    Closing the iterator (e.g. when the client disconnects) closes the
+    generator on the loop, so its cleanup runs there.
+    """
+    try:
+        while True:
+            try:
+                yield run(generator.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        run(generator.aclose())
+
+
+def on_shutdown(callback: Callable[[], Awaitable]):
+    """Await ``callback()`` on the process-wide loop when the process exits"""
+    _shutdown_callbacks.append(callback)
+
+
+@atexit.register
+def _shutdown():
+    if _loop is None or _loop_pid != os.getpid() or not _loop.is_running():
+        return
+
+    async def close():
+        await asyncio.gather(*(callback() for callback in _shutdown_callbacks), return_exceptions=True)
+
+    try:
+        run(close(), timeout=5)
+    except Exception:
+        pass
+    _loop.call_soon_threadsafe(_loop.stop)
@@ -1,91 +1,1111 @@
 import requests
+import hashlib
+import heapq
+import itertools
+import json
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qs, urlparse
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from django.conf import settings
 from django.core.cache import cache
 
+from .rate_limit import PRIORITY_INTERACTIVE, RateLimitExceeded, get_scheduler, is_rate_limited
+from .singleflight import SingleFlight
+
 logger = logging.getLogger(__name__)
 
+# Bump when the shape of cached GitHub entries changes
+CACHE_KEY_VERSION = 2
+
+# Headers of every REST request (the token is added per request)
+API_HEADERS = {
+    'Accept': 'application/vnd.github.v3+json',
+    'User-Agent': 'GitHub-Project-Analyzer'
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+# Concurrent cache misses for the same resource share one request, keyed by cache key
+_inflight_requests = SingleFlight()
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled session used for GitHub API calls"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retry = Retry(
+                    total=settings.GITHUB_API_MAX_RETRIES,
+                    connect=settings.GITHUB_API_MAX_RETRIES,
+                    read=settings.GITHUB_API_MAX_RETRIES,
+                    status=settings.GITHUB_API_MAX_RETRIES,
+                    backoff_factor=settings.GITHUB_API_BACKOFF_FACTOR,
+                    status_forcelist=(500, 502, 503, 504),
+                    allowed_methods=frozenset(['GET', 'HEAD', 'POST']),
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=settings.GITHUB_API_POOL_CONNECTIONS,
+                    pool_maxsize=settings.GITHUB_API_POOL_SIZE,
+                    max_retries=retry,
+                )
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def make_cache_key(endpoint: str, params: Dict = None) -> str:
+    """Build a cache key that is identical in every process for the same request
+    
+    Unlike ``hash()``, which is randomised per interpreter, the key is a
+    digest of the endpoint and its sorted, stringified parameters, so
+    workers sharing a cache backend reuse each other's responses.
+    """
+    if endpoint.startswith(settings.GITHUB_API_BASE_URL):
+        endpoint = endpoint[len(settings.GITHUB_API_BASE_URL):]
+    normalized = sorted(
+        (str(key), str(value)) for key, value in (params or {}).items()
+        if value is not None
+    )
+    digest = hashlib.sha256(
+        json.dumps([endpoint, normalized], separators=(',', ':')).encode('utf-8')
+    ).hexdigest()
+    return f"github_api:v{CACHE_KEY_VERSION}:{digest}"
+
+
+# Outcomes of a GitHub API request (see ``APIResult``)
+RESULT_OK = 'ok'
+RESULT_NOT_FOUND = 'not_found'
+RESULT_FORBIDDEN = 'forbidden'
+RESULT_RATE_LIMITED = 'rate_limited'
+RESULT_TRANSIENT = 'transient'
+# 202 Accepted: GitHub is still computing a statistics resource
+RESULT_PENDING = 'pending'
+
+# 409 is what GitHub answers for the contents, commits or tree of an empty repository
+NOT_FOUND_STATUSES = (404, 409, 410)
+FORBIDDEN_STATUSES = (401, 403, 451)
+
+
+def classify_status(status_code: int) -> str:
+    """Classify the HTTP status of an unsuccessful response
+    
+    Rate-limited responses never get here: ``_send`` retries them and
+    raises ``RateLimitExceeded`` once every token is exhausted. Anything
+    that is neither missing nor refused (5xx, other 4xx) is treated as
+    transient and is not cached.
+    """
+    if status_code in NOT_FOUND_STATUSES:
+        return RESULT_NOT_FOUND
+    if status_code in FORBIDDEN_STATUSES:
+        return RESULT_FORBIDDEN
+    return RESULT_TRANSIENT
+
+
+class APIResult(NamedTuple):
+    """Outcome of a GitHub API request
+    
+    ``status`` is one of the ``RESULT_*`` constants; ``entry`` is the cache
+    entry of a successful request (or the stale entry kept while a pending
+    one is computed) and ``error`` the exception behind a rate-limited or
+    transient failure.
+    """
+    status: str
+    entry: Optional[Dict] = None
+    error: Optional[Exception] = None
+    
+    @property
+    def ok(self) -> bool:
+        return self.status == RESULT_OK
+    
+    @property
+    def data(self) -> Optional[Any]:
+        return self.entry['data'] if self.entry else None
+
+
+def fields(*names: str) -> Dict[str, None]:
+    """Projection schema keeping ``names`` as they are"""
+    return dict.fromkeys(names)
+
+
+# Fields of the repository object the analysis reads (the same ones the GraphQL backend fills in)
+REPOSITORY_FIELDS = fields(
+    'full_name', 'description', 'html_url', 'created_at', 'updated_at', 'pushed_at', 'stargazers_count',
+    'watchers_count', 'forks_count', 'open_issues_count', 'language', 'default_branch',
+)
+
+# Fields kept of each response, by the path below /repos/{owner}/{repo}. A schema maps
+# a field to the schema of its value (None keeps it whole) and applies to each item of
+# a list; anything GitHub sends beyond it is dropped before the response is cached.
+PROJECTIONS = [
+    (re.compile(r''), REPOSITORY_FIELDS),
+    (re.compile(r'/commits'), {'sha': None, 'commit': {'author': fields('date')}}),
+    (re.compile(r'/issues'), fields('number', 'state', 'created_at', 'updated_at', 'comments', 'comments_url')),
+    (re.compile(r'/issues/\d+/comments'), fields('created_at')),
+    (re.compile(r'/pulls'), fields('number', 'state', 'created_at', 'updated_at', 'merged_at')),
+    (re.compile(r'/contributors'), fields('login', 'contributions')),
+    (re.compile(r'/releases'), fields('tag_name', 'name', 'created_at', 'published_at')),
+    (re.compile(r'/stargazers'), fields('login')),
+    (re.compile(r'/forks'), fields('full_name', 'created_at', 'stargazers_count')),
+    (re.compile(r'/git/trees/[^/]+'), {'sha': None, 'truncated': None, 'tree': fields('path', 'type')}),
+    (re.compile(r'/contents/.+'), fields('type', 'path', 'sha', 'encoding', 'content')),
+]
+
+# Pagination links address repositories by id (/repositories/<id>/...)
+REPOSITORY_PATH = re.compile(r'/(?:repos/[^/]+/[^/]+|repositories/\d+)(.*)$')
+
+
+def projection_for(endpoint: str) -> Optional[Dict]:
+    """Projection schema of an endpoint (relative or absolute), or None to keep responses whole"""
+    match = REPOSITORY_PATH.search(urlparse(endpoint).path)
+    if not match:
+        return None
+    for pattern, schema in PROJECTIONS:
+        if pattern.fullmatch(match.group(1)):
+            return schema
+    return None
+
+
+def project(data: Any, schema: Optional[Dict]) -> Any:
+    """Keep only the fields of ``schema`` in ``data`` (a record or a list of records)"""
+    if schema is None:
+        return data
+    if isinstance(data, list):
+        return [project(item, schema) for item in data]
+    if isinstance(data, dict):
+        return {name: project(data[name], sub) for name, sub in schema.items() if name in data}
+    return data
+
+
+def negative_cache_entry(status: str) -> Dict:
+    """Build the cache entry stored for a resource GitHub reported as missing"""
+    return {'status': status, 'fetched_at': time.time()}
+
+
+def is_fresh(entry: Optional[Dict]) -> bool:
+    """Whether a cache entry may be served without revalidating it"""
+    return bool(entry) and time.time() - entry['fetched_at'] < settings.GITHUB_API_CACHE_TTL
+
+
+def cached_result(entry: Optional[Dict]) -> Optional[APIResult]:
+    """Outcome a cache entry answers without a request (None when it must be revalidated)"""
+    if entry and entry.get('status') == RESULT_NOT_FOUND:
+        return APIResult(RESULT_NOT_FOUND)
+    if is_fresh(entry):
+        return APIResult(RESULT_OK, entry)
+    return None
+
+
+def result_entry(result: APIResult) -> Optional[Dict]:
+    """Cache entry of a result (``None`` if it failed), raising ``RateLimitExceeded`` if it was rate limited"""
+    if result.status == RESULT_RATE_LIMITED:
+        raise result.error
+    return result.entry
+
+
+class RepositoryUnavailable(Exception):
+    """Raised when a repository itself cannot be read
+    
+    ``status`` is the ``RESULT_*`` outcome of requesting it: missing,
+    forbidden, or transient (worth retrying later).
+    """
+    
+    def __init__(self, status: str, error: Optional[Exception] = None):
+        super().__init__(f"Repository unavailable ({status})" + (f": {error}" if error else ''))
+        self.status = status
+        self.error = error
+
+
+def repository_data(result: APIResult) -> Dict:
+    """Repository object of a ``get_repository_result`` outcome
+    
+    Raises ``RateLimitExceeded`` if it was rate limited and
+    ``RepositoryUnavailable`` if it failed otherwise.
+    """
+    entry = result_entry(result)
+    if not result.ok:
+        raise RepositoryUnavailable(result.status, result.error)
+    return entry['data']
+
+
+# A value of ``get_repositories_stats``
+RepositoryStats = Union[Dict, RepositoryUnavailable]
+
+
+def unwrap_stats(stats: RepositoryStats) -> Dict:
+    """One value of ``get_repositories_stats``, raising the ``RepositoryUnavailable`` it may hold"""
+    if isinstance(stats, RepositoryUnavailable):
+        raise stats
+    return stats
+
+
+def conditional_headers(headers: Dict, entry: Optional[Dict]) -> Dict:
+    """Return ``headers`` plus the validators of a stale cache entry"""
+    if not entry:
+        return headers
+    headers = dict(headers)
+    if entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+    return headers
+
+
+def build_cache_entry(response, data: Any) -> Dict:
+    """Build the cache entry stored for a successful response"""
+    return {
+        'data': data,
+        'links': {rel: link['url'] for rel, link in response.links.items()},
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'fetched_at': time.time(),
+    }
+
+
+def last_page_number(entry: Dict) -> Optional[int]:
+    """Read the page number of an entry's ``Link: rel="last"`` relation"""
+    last = entry['links'].get('last')
+    if last:
+        page = parse_qs(urlparse(last).query).get('page')
+        if page and page[0].isdigit():
+            return int(page[0])
+    return None
+
+
+def count_items(entry: Optional[Dict]) -> Optional[int]:
+    """Total items of a list fetched one item per page (see ``GitHubAPIService.count``)"""
+    if entry is None or not isinstance(entry['data'], list):
+        return None
+    last_page = last_page_number(entry)
+    return last_page if last_page is not None else len(entry['data'])
+
+
+def first_page_params(params: Optional[Dict], limit: Optional[int]) -> Optional[Dict]:
+    """Query parameters of a list's first page, or None when ``limit`` asks for no items"""
+    params = dict(params or {})
+    params.setdefault('per_page', 100)
+    if limit is not None:
+        if limit <= 0:
+            return None
+        params['per_page'] = min(params['per_page'], limit)
+    return params
+
+
+def next_page_url(entry: Dict, yielded: int, limit: Optional[int]) -> Optional[str]:
+    """``next`` link of a page worth prefetching, given the items yielded before the page"""
+    next_url = entry['links'].get('next')
+    if next_url and (limit is None or yielded + len(entry['data']) < limit):
+        return next_url
+    return None
+
+
+def graphql_cache_key(query: str, variables: Dict) -> str:
+    """Build the cache key of a GraphQL query"""
+    return make_cache_key('/graphql', {
+        'query': query,
+        'variables': json.dumps(variables, sort_keys=True),
+    })
+
+
+def total_count_query(connection: str) -> str:
+    """Build a GraphQL query reading ``totalCount`` of a repository connection"""
+    return (
+        "query($owner: String!, $name: String!) { "
+        f"repository(owner: $owner, name: $name) {{ {connection} {{ totalCount }} }} }}"
+    )
+
+
+def read_total_count(data: Optional[Dict], connection: str) -> Optional[int]:
+    """Extract the ``totalCount`` requested by ``total_count_query``"""
+    repository = (data or {}).get('repository') or {}
+    field = connection.split('(')[0]
+    return (repository.get(field) or {}).get('totalCount')
+
+
+def graphql_data(payload: Dict) -> Optional[Dict]:
+    """The ``data`` of a GraphQL response, logging any errors reported next to it"""
+    if payload.get('errors'):
+        logger.warning(f"GitHub GraphQL query returned errors: {payload['errors']}")
+    return payload.get('data')
+
+
+PULL_REQUEST_STATES = {'open': '[OPEN]', 'closed': '[CLOSED, MERGED]', 'all': '[OPEN, CLOSED, MERGED]'}
+
+
+class RepositoryTree:
+    """Case-insensitive index of every path in a repository's git tree"""
+    
+    def __init__(self, sha: str, entries: Iterable[Dict], truncated: bool = False):
+        self.sha = sha
+        self.truncated = truncated
+        self._paths = {entry['path'].lower(): entry.get('type', 'blob') for entry in entries}
+    
+    def __contains__(self, path: str) -> bool:
+        return path.strip('/').lower() in self._paths
+    
+    def __len__(self) -> int:
+        return len(self._paths)
+    
+    def exists(self, path: str) -> bool:
+        """Check if a file or directory exists in the tree"""
+        return path in self
+    
+    def is_dir(self, path: str) -> bool:
+        """Check if a path exists and is a directory"""
+        return self._paths.get(path.strip('/').lower()) == 'tree'
+
+
+# Path indexes keyed by tree SHA; a SHA names immutable content so entries never go stale
+_tree_indexes: 'OrderedDict[str, RepositoryTree]' = OrderedDict()
+_tree_indexes_lock = threading.Lock()
+
+
+def _get_tree_index(data: Dict) -> RepositoryTree:
+    """Build (or reuse) the path index for a git tree API response"""
+    sha = data['sha']
+    with _tree_indexes_lock:
+        tree = _tree_indexes.get(sha)
+        if tree is not None:
+            _tree_indexes.move_to_end(sha)
+            return tree
+    
+    tree = RepositoryTree(sha, data.get('tree', []), data.get('truncated', False))
+    with _tree_indexes_lock:
+        _tree_indexes[sha] = tree
+        while len(_tree_indexes) > settings.GITHUB_TREE_INDEX_CACHE_SIZE:
+            _tree_indexes.popitem(last=False)
+    return tree
+
+
+def cached_tree_index(sha: Optional[str]) -> Optional[RepositoryTree]:
+    """Return the path index of tree ``sha`` if this process still holds it"""
+    if not sha:
+        return None
+    with _tree_indexes_lock:
+        return _tree_indexes.get(sha)
+
+
+def tree_index(data: Optional[Dict]) -> Optional[RepositoryTree]:
+    """Path index of a git tree API response, or None if there is no tree"""
+    if not data or 'sha' not in data:
+        return None
+    return _get_tree_index(data)
+
+
+def tree_presence(paths: List[str], tree: Optional[RepositoryTree]) -> Tuple[Dict[str, bool], List[str]]:
+    """Answer ``paths`` from ``tree``, returning the presence map and the paths still to probe
+    
+    A path needs probing through the contents API when there is no tree,
+    or when it is missing from a truncated one.
+    """
+    present = {}
+    if tree is not None:
+        present = {path: path in tree for path in paths}
+        if not tree.truncated:
+            return present, []
+    return present, [path for path in paths if not present.get(path)]
+
+
+def first_comment_cache_key(issue: Dict) -> str:
+    """Cache key of an issue's first comment time, which changes whenever the issue does"""
+    return make_cache_key('first_comment', {
+        'url': issue['comments_url'],
+        'updated_at': issue.get('updated_at'),
+    })
+
+
+def needs_first_comment(issue: Dict) -> bool:
+    """Whether an issue's first comment time has to be looked up"""
+    return not issue.get('first_comment_at') and bool(issue.get('comments'))
+
+
+def read_first_comment(comments: Optional[List[Dict]]) -> Optional[str]:
+    """Creation time of the first of a page of comments"""
+    return comments[0]['created_at'] if comments else None
+
+
+# Bump when the shape of repository snapshots changes
+SNAPSHOT_VERSION = 2
+
+# Commit window analyzed by RepositoryAnalyzer
+COMMIT_WINDOW_DAYS = 30
+
+# Past this many issue updates since the last sync, the issue sample is refetched instead
+ISSUE_UPDATES_LIMIT = 100
+
+# Issue fields kept in snapshots (all RepositoryAnalyzer reads)
+ISSUE_FIELDS = ('number', 'created_at', 'updated_at', 'comments', 'comments_url', 'first_comment_at')
+
+
+# Commits listed by a crawl once the weekly commit activity is cached (one page)
+ACTIVITY_COMMIT_LIMIT = 100
+
+
+def statistics_endpoint(owner: str, repo: str, name: str) -> str:
+    """Endpoint of one of a repository's precomputed ``/stats`` resources"""
+    return f"/repos/{owner}/{repo}/stats/{name}"
+
+
+def commit_activity_cache_key(owner: str, repo: str) -> str:
+    """Cache key of a repository's weekly commit activity"""
+    return make_cache_key(statistics_endpoint(owner, repo, 'commit_activity'))
+
+
+def has_fresh_data(entry: Optional[Dict]) -> bool:
+    """Whether a cache entry is fresh and holds a non-empty body"""
+    return is_fresh(entry) and bool(entry.get('data'))
+
+
+def utc_timestamp(moment: datetime) -> str:
+    """Format a moment the way GitHub formats timestamps (and accepts ``since``)"""
+    return moment.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def window_start(days: int) -> str:
+    """Start of the ``days``-long window ending now, as a GitHub timestamp
+    
+    Rounded down to the hour, so every call within that hour sends the same
+    ``since`` and shares one cache entry.
+    """
+    start = datetime.now(timezone.utc) - timedelta(days=days)
+    return utc_timestamp(start.replace(minute=0, second=0, microsecond=0))
+
+
+def snapshot_key(owner: str, repo: str) -> str:
+    """Cache key of a repository's snapshot"""
+    return make_cache_key('snapshot', {
+        'owner': owner.lower(),
+        'repo': repo.lower(),
+        'version': SNAPSHOT_VERSION,
+    })
+
+
+def commit_date(commit: Dict) -> str:
+    """Author date of a REST-shaped commit record"""
+    return commit['commit']['author']['date'] or ''
+
+
+def slim_commits(commits: List[Dict]) -> List[Dict]:
+    """Reduce commits to the fields the analysis reads"""
+    return [{'sha': commit['sha'], 'commit': {'author': {'date': commit_date(commit)}}} for commit in commits]
+
+
+def slim_issues(issues: List[Dict]) -> List[Dict]:
+    """Reduce issues to the fields the analysis reads"""
+    return [{field: issue[field] for field in ISSUE_FIELDS if field in issue} for issue in issues]
+
+
+def build_snapshot(stats: Dict, synced_at: str, built_at: float) -> Dict:
+    """Keep what an incremental refresh needs from ``stats``, plus its cursors
+    
+    ``synced_at`` is when the data was requested (issue updates are fetched
+    from there on) and ``built_at`` when the repository was last crawled in
+    full.
+    """
+    commits = slim_commits(stats['recent_commits'])
+    return {
+        'built_at': built_at,
+        'synced_at': synced_at,
+        'commits_since': max((commit_date(commit) for commit in commits), default='') or None,
+        'tree_sha': stats['tree'].sha if stats.get('tree') else None,
+        'basic_info': stats['basic_info'],
+        'recent_commits': commits,
+        'commits_truncated': stats['commits_truncated'],
+        'issues': slim_issues(stats['issues']),
+        'topics': stats['topics'],
+        'languages': stats['languages'],
+        'counts': stats['counts'],
+    }
+
+
+def is_refreshable(snapshot: Optional[Dict]) -> bool:
+    """Whether a snapshot may be refreshed incrementally rather than rebuilt"""
+    return bool(snapshot) and time.time() - snapshot['built_at'] < settings.ANALYZER_SNAPSHOT_MAX_AGE
+
+
+def needs_full_commits(stats: Dict) -> bool:
+    """Whether commit counts would have to come from a listing cut at ``ACTIVITY_COMMIT_LIMIT``
+    
+    Crawls list a single page of commits while the weekly commit activity
+    is cached. If the activity is gone by the time it is needed (expired,
+    or GitHub answered 202 while recomputing it), counting that page would
+    silently undercount, so the full listing has to be fetched.
+    """
+    return bool(stats.get('commits_truncated')) and not stats['commit_activity']
+
+
+def has_new_commits(snapshot: Dict, commits: List[Dict]) -> bool:
+    """Whether ``commits`` contains any commit the snapshot does not know yet"""
+    known = {commit['sha'] for commit in snapshot['recent_commits']}
+    return any(commit['sha'] not in known for commit in commits)
+
+
+def merge_commits(known: List[Dict], new: List[Dict], window_start: str) -> List[Dict]:
+    """Add new commits to the known ones, dropping duplicates and commits that left the window"""
+    merged = {commit['sha']: commit for commit in slim_commits(new)}
+    for commit in known:
+        merged.setdefault(commit['sha'], commit)
+    commits = [commit for commit in merged.values() if commit_date(commit) >= window_start]
+    return sorted(commits, key=commit_date, reverse=True)
+
+
+def merge_issues(known: List[Dict], updates: List[Dict], limit: int) -> List[Dict]:
+    """Apply issue updates (of any state) to the sample of newest open issues"""
+    issues = {issue['number']: issue for issue in known}
+    for issue in updates:
+        if issue.get('state') == 'open':
+            issues[issue['number']] = slim_issues([issue])[0]
+        else:
+            issues.pop(issue['number'], None)
+    return sorted(issues.values(), key=lambda issue: issue['created_at'], reverse=True)[:limit]
+
+
+def crawl_calls(service, owner: str, repo: str, activity_cached: bool) -> Dict[str, Tuple]:
+    """Calls of a full crawl, in the form ``fetch_many`` takes (``service`` may be sync or async)
+    
+    Once the weekly commit activity is cached, commit counts come from it
+    and a single page of commits is enough to track new ones.
+    """
+    commit_limit = ACTIVITY_COMMIT_LIMIT if activity_cached else None
+    return {
+        'basic_info': (service.get_repository_result, owner, repo),
+        'commit_activity': (service.get_statistics, owner, repo, 'commit_activity'),
+        'recent_commits': (service.get_recent_commits, owner, repo, COMMIT_WINDOW_DAYS, commit_limit),
+        'issues': (service.get_issues, owner, repo, 'open', settings.ANALYZER_RESPONSE_SAMPLE_SIZE),
+        'topics': (service.get_topics, owner, repo),
+        'languages': (service.get_languages, owner, repo),
+        'tree': (service.get_repository_tree, owner, repo),
+        'contributors_count': (service.count_contributors, owner, repo),
+        'open_pulls_count': (service.count_pull_requests, owner, repo),
+        'releases_count': (service.count_releases, owner, repo),
+    }
+
+
+def crawled_stats(results: Dict, activity_cached: bool) -> Dict:
+    """Build repository stats from the results of ``crawl_calls``
+    
+    ``commits_truncated`` tells whether the commit listing stopped at
+    ``ACTIVITY_COMMIT_LIMIT`` (see ``needs_full_commits``). Raises
+    ``RepositoryUnavailable`` if the repository could not be read.
+    """
+    basic_info = repository_data(results['basic_info'])
+    
+    return {
+        'basic_info': basic_info,
+        'recent_commits': results['recent_commits'],
+        'commits_truncated': activity_cached and len(results['recent_commits']) >= ACTIVITY_COMMIT_LIMIT,
+        'issues': results['issues'],
+        'topics': results['topics'],
+        'languages': results['languages'],
+        'tree': results['tree'],
+        'commit_activity': results['commit_activity'],
+        'counts': {
+            'contributors': results['contributors_count'] or 0,
+            'open_pulls': results['open_pulls_count'] or 0,
+            'releases': results['releases_count'] or 0,
+            'open_issues': basic_info['open_issues_count'],
+        },
+    }
+
+
+def refresh_calls(service, owner: str, repo: str, snapshot: Dict) -> Dict[str, Tuple]:
+    """Calls every incremental refresh of a snapshot makes
+    
+    Only commits after the newest known one and issues updated since the
+    last sync are fetched. ``basic_info`` is an ``APIResult``; read it with
+    ``repository_data`` before passing the results on.
+    """
+    return {
+        'basic_info': (service.get_repository_result, owner, repo),
+        'commit_activity': (service.get_statistics, owner, repo, 'commit_activity'),
+        'new_commits': (service.get_recent_commits, owner, repo, COMMIT_WINDOW_DAYS, None,
+                        snapshot['commits_since']),
+        'issue_updates': (service.get_issues, owner, repo, 'all', ISSUE_UPDATES_LIMIT, snapshot['synced_at']),
+        'open_pulls_count': (service.count_pull_requests, owner, repo),
+        'releases_count': (service.count_releases, owner, repo),
+    }
+
+
+def changed_calls(service, owner: str, repo: str, snapshot: Dict,
+                  results: Dict) -> Tuple[Dict[str, Tuple], Optional[RepositoryTree]]:
+    """Calls a refresh makes only when something they depend on changed
+    
+    The tree, languages and contributor count are refetched only when new
+    commits arrived, and topics only when the repository metadata changed.
+    Also returns the tree index the refresh can reuse, if any.
+    """
+    calls = {}
+    tree = None
+    if has_new_commits(snapshot, results['new_commits']):
+        calls['languages'] = (service.get_languages, owner, repo)
+        calls['contributors_count'] = (service.count_contributors, owner, repo)
+    else:
+        tree = cached_tree_index(snapshot['tree_sha'])
+    if tree is None:
+        calls['tree'] = (service.get_repository_tree, owner, repo)
+    if results['basic_info']['updated_at'] != snapshot['basic_info']['updated_at']:
+        calls['topics'] = (service.get_topics, owner, repo)
+    if len(results['issue_updates']) >= ISSUE_UPDATES_LIMIT:
+        calls['issues'] = (service.get_issues, owner, repo, 'open', settings.ANALYZER_RESPONSE_SAMPLE_SIZE)
+    return calls, tree
+
+
+def merge_refresh(snapshot: Dict, results: Dict, changed: Dict, tree: Optional[RepositoryTree]) -> Dict:
+    """Build repository stats from a snapshot and the results of refreshing it
+    
+    ``results`` holds the calls every refresh makes, ``changed`` the ones
+    only made when something they depend on changed.
+    """
+    commits_start = window_start(COMMIT_WINDOW_DAYS)
+    if 'issues' in changed:
+        issues = slim_issues(changed['issues'])
+    else:
+        issues = merge_issues(snapshot['issues'], results['issue_updates'], settings.ANALYZER_RESPONSE_SAMPLE_SIZE)
+    contributors = changed.get('contributors_count')
+    
+    return {
+        'basic_info': results['basic_info'],
+        'recent_commits': merge_commits(snapshot['recent_commits'], results['new_commits'], commits_start),
+        'commits_truncated': snapshot['commits_truncated'],
+        'issues': issues,
+        'topics': changed.get('topics', snapshot['topics']),
+        'languages': changed.get('languages', snapshot['languages']),
+        'tree': tree,
+        'commit_activity': results['commit_activity'],
+        'counts': {
+            'contributors': snapshot['counts']['contributors'] if contributors is None else contributors,
+            'open_pulls': results['open_pulls_count'] or 0,
+            'releases': results['releases_count'] or 0,
+            'open_issues': results['basic_info']['open_issues_count'],
+        },
+    }
+
+
+class StatisticsWarmer:
+    """Polls statistics GitHub is still computing until their answer is cached
+    
+    A single daemon thread keeps a heap of due polls. Each poll is a plain
+    ``_fetch_result``, which caches the resource once GitHub answers
+    ``200``; a resource still pending is polled again after twice the delay,
+    up to ``GITHUB_STATS_POLL_ATTEMPTS`` times.
+    """
+    
+    def __init__(self):
+        self._queue = []
+        self._pending = set()
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+    
+    def warm(self, endpoint: str, priority: int = PRIORITY_INTERACTIVE) -> bool:
+        """Start polling ``endpoint``; returns False if it is already being polled"""
+        with self._condition:
+            if endpoint in self._pending:
+                return False
+            self._pending.add(endpoint)
+            self._push(endpoint, priority, 0)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='github-stats', daemon=True)
+                self._thread.start()
+        return True
+    
+    def _push(self, endpoint: str, priority: int, attempt: int):
+        due = time.time() + settings.GITHUB_STATS_POLL_INTERVAL * (2 ** attempt)
+        heapq.heappush(self._queue, (due, next(self._order), endpoint, priority, attempt))
+        self._condition.notify()
+    
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue or self._queue[0][0] > time.time():
+                    self._condition.wait(self._queue[0][0] - time.time() if self._queue else None)
+                _, _, endpoint, priority, attempt = heapq.heappop(self._queue)
+            
+            try:
+                status = GitHubAPIService(priority=priority)._fetch_result(endpoint).status
+            except Exception as e:
+                logger.error(f"Polling GitHub statistics {endpoint} failed: {e}")
+                status = RESULT_TRANSIENT
+            
+            with self._condition:
+                if status == RESULT_PENDING and attempt + 1 < settings.GITHUB_STATS_POLL_ATTEMPTS:
+                    self._push(endpoint, priority, attempt + 1)
+                else:
+                    if status == RESULT_PENDING:
+                        logger.info(f"GitHub statistics still pending, giving up: {endpoint}")
+                    self._pending.discard(endpoint)
+
+
+_stats_warmer = StatisticsWarmer()
+
+
+def statistics_data(result: APIResult, endpoint: str, priority: int) -> Optional[Any]:
+    """Data of a ``/stats`` result, polling the resource in the background while GitHub computes it"""
+    entry = result_entry(result)
+    if result.status == RESULT_PENDING:
+        _stats_warmer.warm(endpoint, priority)
+    return entry['data'] if entry else None
+
 
 class GitHubAPIService:
     """Service class for interacting with GitHub API"""
     
-    def __init__(self):
-        self.base_url = "https://api.github.com"
-        self.headers = {
-            'Accept': 'application/vnd.github.v3+json',
-            'User-Agent': 'GitHub-Project-Analyzer'
-        }
+    def __init__(self, priority: int = PRIORITY_INTERACTIVE):
+        self.base_url = settings.GITHUB_API_BASE_URL
+        self.session = get_session()
+        self.timeout = (settings.GITHUB_API_CONNECT_TIMEOUT, settings.GITHUB_API_READ_TIMEOUT)
+        self.headers = dict(API_HEADERS)
         
-        # Add token if available
-        if settings.GITHUB_TOKEN:
-            self.headers['Authorization'] = f'token {settings.GITHUB_TOKEN}'
+        # Tokens are handed out per request by the rate limit scheduler
+        self.scheduler = get_scheduler()
+        self.priority = priority
+    
+    def _send(self, url: str, headers: Dict, params: Dict = None,
+              json_body: Dict = None) -> requests.Response:
+        """Send a request through the rate limit scheduler (a POST when ``json_body`` is given)
+        
+        Responses rejected by a rate limit are retried once per token, so a
+        call only fails when every token in the pool is exhausted; the
+        scheduler then raises ``RateLimitExceeded``.
+        """
+        method = 'GET' if json_body is None else 'POST'
+        for _ in range(len(self.scheduler.tokens) + 1):
+            state = self.scheduler.acquire(self.priority)
+            request_headers = dict(headers)
+            if state.token:
+                request_headers['Authorization'] = f'token {state.token}'
+            response = None
+            try:
+                response = self.session.request(
+                    method, url, headers=request_headers, params=params,
+                    json=json_body, timeout=self.timeout
+                )
+            finally:
+                self.scheduler.release(state, response)
+            if not is_rate_limited(response):
+                return response
+        raise RateLimitExceeded(max(state.blocked_until, time.time()))
+    
+    def _fetch(self, endpoint: str, params: Dict = None) -> Optional[Dict]:
+        """Fetch a GitHub API resource and return its cache entry, or ``None`` if it failed
+        
+        Raises ``RateLimitExceeded`` when the request could not be sent
+        within the rate limit (see ``_fetch_result``).
+        """
+        return result_entry(self._fetch_result(endpoint, params))
+    
+    def _fetch_result(self, endpoint: str, params: Dict = None) -> APIResult:
+        """Fetch a GitHub API resource and classify the outcome
+        
+        A successful entry holds the parsed body, cut down to the fields
+        ``PROJECTIONS`` lists for the endpoint (``data``), the ``Link`` relations
+        (``links``) and the ``ETag``/``Last-Modified`` validators. Once an
+        entry is older than ``GITHUB_API_CACHE_TTL`` it is revalidated with a
+        conditional request; a ``304 Not Modified`` just refreshes the entry
+        without downloading or parsing the body again (and does not count
+        against the rate limit). ``endpoint`` may also be an absolute URL,
+        such as a ``next`` link. Not-found answers are cached too, for
+        ``GITHUB_API_NEGATIVE_CACHE_TTL`` seconds, so missing files and
+        repositories are not re-confirmed on every call. Concurrent misses
+        for the same resource wait for a single request.
+        """
+        cache_key = make_cache_key(endpoint, params)
+        entry = cache.get(cache_key)
+        result = cached_result(entry)
+        if result is not None:
+            return result
+        
+        return _inflight_requests.do(cache_key, self._revalidate, cache_key, endpoint, params, entry)
+    
+    def _revalidate(self, cache_key: str, endpoint: str, params: Optional[Dict],
+                    entry: Optional[Dict]) -> APIResult:
+        """Fetch (or conditionally refetch) a resource and cache the outcome"""
+        url = endpoint if endpoint.startswith('http') else f"{self.base_url}{endpoint}"
+        headers = conditional_headers(self.headers, entry)
+        
+        try:
+            response = self._send(url, headers, params)
+            if response.status_code == 304 and entry:
+                entry['fetched_at'] = time.time()
+                cache.set(cache_key, entry, settings.GITHUB_API_CACHE_RETENTION)
+                return APIResult(RESULT_OK, entry)
+            if response.status_code == 202:
+                # The body is empty until GitHub has computed the resource, so it is not cached
+                return APIResult(RESULT_PENDING, entry)
+            if response.ok:
+                entry = build_cache_entry(response, project(response.json(), projection_for(endpoint)))
+                cache.set(cache_key, entry, settings.GITHUB_API_CACHE_RETENTION)
+                return APIResult(RESULT_OK, entry)
+        except RateLimitExceeded as e:
+            return APIResult(RESULT_RATE_LIMITED, error=e)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.error(f"GitHub API request failed: {e}")
+            return APIResult(RESULT_TRANSIENT, error=e)
+        
+        status = classify_status(response.status_code)
+        if status == RESULT_NOT_FOUND:
+            logger.debug(f"GitHub API resource not found ({response.status_code}): {url}")
+            cache.set(cache_key, negative_cache_entry(status), settings.GITHUB_API_NEGATIVE_CACHE_TTL)
+        else:
+            logger.error(f"GitHub API request failed ({response.status_code}): {url}")
+        return APIResult(status)
     
     def _make_request(self, endpoint: str, params: Dict = None) -> Optional[Dict]:
         """Make a request to GitHub API with caching"""
-        cache_key = f"github_api:{endpoint}:{hash(str(params))}"
-        cached_response = cache.get(cache_key)
+        entry = self._fetch(endpoint, params)
+        return entry['data'] if entry else None
+    
+    def _graphql(self, query: str, variables: Dict = None) -> Optional[Dict]:
+        """Run a GraphQL v4 query and return its ``data`` (GraphQL requires a token)"""
+        if not self.scheduler.has_tokens:
+            return None
         
-        if cached_response:
-            return cached_response
+        variables = variables or {}
+        cache_key = graphql_cache_key(query, variables)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
         
-        url = f"{self.base_url}{endpoint}"
+        return _inflight_requests.do(cache_key, self._graphql_request, cache_key, query, variables)
+    
+    def _graphql_request(self, cache_key: str, query: str, variables: Dict) -> Optional[Dict]:
+        """Send a GraphQL query and cache its ``data``"""
         try:
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self._send(f"{self.base_url}/graphql", self.headers,
+                                  json_body={'query': query, 'variables': variables})
             response.raise_for_status()
-            data = response.json()
-            
-            # Cache for 5 minutes
-            cache.set(cache_key, data, 300)
-            return data
-        except requests.exceptions.RequestException as e:
-            logger.error(f"GitHub API request failed: {e}")
+            payload = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.error(f"GitHub GraphQL request failed: {e}")
             return None
+        
+        data = graphql_data(payload)
+        if data:
+            cache.set(cache_key, data, settings.GITHUB_API_CACHE_TTL)
+        return data
+    
+    def count(self, endpoint: str, params: Dict = None) -> Optional[int]:
+        """Count the items of a list endpoint without downloading them
+        
+        Requests a single item per page, so the page number of the
+        ``Link: rel="last"`` relation is the total number of items.
+        """
+        return count_items(self._fetch(endpoint, dict(params or {}, per_page=1)))
+    
+    def _graphql_total_count(self, owner: str, repo: str, connection: str) -> Optional[int]:
+        """Read ``totalCount`` of a repository connection through GraphQL"""
+        data = self._graphql(total_count_query(connection), {'owner': owner, 'name': repo})
+        return read_total_count(data, connection)
+    
+    def count_contributors(self, owner: str, repo: str) -> Optional[int]:
+        """Count repository contributors"""
+        return self.count(f"/repos/{owner}/{repo}/contributors")
+    
+    def count_pull_requests(self, owner: str, repo: str, state: str = 'open') -> Optional[int]:
+        """Count repository pull requests"""
+        total = self.count(f"/repos/{owner}/{repo}/pulls", {'state': state})
+        if total is None:
+            total = self._graphql_total_count(owner, repo, f"pullRequests(states: {PULL_REQUEST_STATES[state]})")
+        return total
+    
+    def count_releases(self, owner: str, repo: str) -> Optional[int]:
+        """Count repository releases"""
+        total = self.count(f"/repos/{owner}/{repo}/releases")
+        if total is None:
+            total = self._graphql_total_count(owner, repo, 'releases')
+        return total
+    
+    def iter_paginated(self, endpoint: str, params: Dict = None,
+                       limit: Optional[int] = None) -> Iterator[Dict]:
+        """Yield the items of a list endpoint across all of its pages
+        
+        Pages are followed through ``Link: rel="next"``. The next page is
+        requested in the background while the current one is consumed, so
+        at most two pages are held in memory. Fetching stops as soon as
+        ``limit`` items have been yielded.
+        """
+        params = first_page_params(params, limit)
+        if params is None:
+            return
+        
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='github-page')
+        try:
+            entry = self._fetch(endpoint, params)
+            yielded = 0
+            while entry and isinstance(entry['data'], list):
+                next_url = next_page_url(entry, yielded, limit)
+                upcoming = executor.submit(self._fetch, next_url) if next_url else None
+                for item in entry['data']:
+                    yield item
+                    yielded += 1
+                    if limit is not None and yielded >= limit:
+                        return
+                entry = upcoming.result() if upcoming else None
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
     
     def get_repository(self, owner: str, repo: str) -> Optional[Dict]:
         """Get basic repository information"""
         return self._make_request(f"/repos/{owner}/{repo}")
     
-    def get_repository_stats(self, owner: str, repo: str) -> Optional[Dict]:
-        """Get comprehensive repository statistics"""
-        repo_data = self.get_repository(owner, repo)
-        if not repo_data:
-            return None
+    def get_repository_result(self, owner: str, repo: str) -> APIResult:
+        """Get basic repository information along with why it failed, if it did (see ``APIResult``)"""
+        return self._fetch_result(f"/repos/{owner}/{repo}")
+    
+    def fetch_many(self, calls: Dict[Any, Tuple[Callable, ...]]) -> Dict[Any, Any]:
+        """Run independent API calls concurrently and return their results by key
+
+        Each value is a ``(callable, *args)`` tuple. At most
+        ``GITHUB_API_MAX_CONCURRENCY`` calls are in flight at once.
+        """
+        if not calls:
+            return {}
+        max_workers = max(1, min(settings.GITHUB_API_MAX_CONCURRENCY, len(calls)))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='github-api') as executor:
+            futures = {
+                key: executor.submit(call[0], *call[1:])
+                for key, call in calls.items()
+            }
+            return {key: future.result() for key, future in futures.items()}
+    
+    def get_repository_stats(self, owner: str, repo: str) -> Dict:
+        """Get comprehensive repository statistics
+        
+        List endpoints that are only needed for their size are counted
+        (see ``count``) instead of downloaded; the totals are in ``counts``.
+        The first call crawls the repository and keeps a snapshot of the
+        result; later calls bring the snapshot up to date incrementally (see
+        ``_refresh_stats``) until it is ``ANALYZER_SNAPSHOT_MAX_AGE`` seconds
+        old and the repository is crawled again. The weekly commit activity
+        is requested up front, so GitHub starts computing it (see
+        ``get_statistics``) while the rest is fetched; if it is missing while
+        the commit listing was cut short, the full listing is fetched (see
+        ``needs_full_commits``). Raises ``RepositoryUnavailable`` if the
+        repository cannot be read.
+        """
+        key = snapshot_key(owner, repo)
+        snapshot = cache.get(key)
+        # Taken before any request, so no update can fall between two syncs
+        synced_at = utc_timestamp(datetime.now(timezone.utc))
+        
+        if is_refreshable(snapshot):
+            stats = self._refresh_stats(owner, repo, snapshot)
+            built_at = snapshot['built_at']
+        else:
+            stats = self._crawl_stats(owner, repo)
+            built_at = time.time()
+        
+        if needs_full_commits(stats):
+            stats = dict(stats, recent_commits=self.get_recent_commits(owner, repo, COMMIT_WINDOW_DAYS),
+                         commits_truncated=False)
+        
+        if stats:
+            cache.set(key, build_snapshot(stats, synced_at, built_at), settings.GITHUB_API_CACHE_RETENTION)
+        return stats
+    
+    def _crawl_stats(self, owner: str, repo: str) -> Dict:
+        """Fetch every statistic of a repository from scratch (see ``crawl_calls``)"""
+        activity_cached = has_fresh_data(cache.get(commit_activity_cache_key(owner, repo)))
+        return crawled_stats(self.fetch_many(crawl_calls(self, owner, repo, activity_cached)), activity_cached)
+    
+    def _refresh_stats(self, owner: str, repo: str, snapshot: Dict) -> Dict:
+        """Bring a repository snapshot up to date with a few small requests
         
-        # Get additional data
-        contributors = self.get_contributors(owner, repo)
-        commits = self.get_recent_commits(owner, repo)
-        issues = self.get_issues(owner, repo)
-        pulls = self.get_pull_requests(owner, repo)
-        
-        return {
-            'basic_info': repo_data,
-            'contributors': contributors,
-            'recent_commits': commits,
-            'issues': issues,
-            'pulls': pulls
-        }
-    
-    def get_contributors(self, owner: str, repo: str) -> List[Dict]:
+        See ``refresh_calls`` and ``changed_calls`` for what is fetched; the
+        results are merged into the snapshot by ``merge_refresh``.
+        """
+        results = self.fetch_many(refresh_calls(self, owner, repo, snapshot))
+        results['basic_info'] = repository_data(results['basic_info'])
+        
+        calls, tree = changed_calls(self, owner, repo, snapshot, results)
+        changed = self.fetch_many(calls)
+        return merge_refresh(snapshot, results, changed, changed.get('tree', tree))
+    
+    def get_repositories_stats(self, repositories: List[Tuple[str, str]]) -> Dict[Tuple[str, str], RepositoryStats]:
+        """Get statistics for several ``(owner, repo)`` pairs concurrently
+        
+        A repository that cannot be read maps to its ``RepositoryUnavailable``
+        (see ``unwrap_stats``), so one failure does not fail the others.
+        """
+        return self.fetch_many({
+            (owner, repo): (self._stats_or_unavailable, owner, repo)
+            for owner, repo in repositories
+        })
+    
+    def _stats_or_unavailable(self, owner: str, repo: str) -> RepositoryStats:
+        """``get_repository_stats``, returning rather than raising ``RepositoryUnavailable``"""
+        try:
+            return self.get_repository_stats(owner, repo)
+        except RepositoryUnavailable as e:
+            return e
+    
+    def get_contributors(self, owner: str, repo: str, limit: Optional[int] = None) -> List[Dict]:
         """Get repository contributors"""
-        return self._make_request(f"/repos/{owner}/{repo}/contributors") or []
+        return list(self.iter_paginated(f"/repos/{owner}/{repo}/contributors", limit=limit))
     
-    def get_recent_commits(self, owner: str, repo: str, days: int = 30) -> List[Dict]:
-        """Get recent commits from the last N days"""
-        since_date = (datetime.now() - timedelta(days=days)).isoformat()
-        params = {'since': since_date}
-        return self._make_request(f"/repos/{owner}/{repo}/commits", params) or []
+    def get_recent_commits(self, owner: str, repo: str, days: int = 30,
+                           limit: Optional[int] = None, since: Optional[str] = None) -> List[Dict]:
+        """Get recent commits from the last N days (or from ``since`` on)"""
+        params = {'since': since or window_start(days)}
+        return list(self.iter_paginated(f"/repos/{owner}/{repo}/commits", params, limit))
     
-    def get_issues(self, owner: str, repo: str, state: str = 'open') -> List[Dict]:
-        """Get repository issues"""
+    def get_issues(self, owner: str, repo: str, state: str = 'open',
+                   limit: Optional[int] = None, since: Optional[str] = None) -> List[Dict]:
+        """Get repository issues (only those updated from ``since`` on, if given)
+        
+        GitHub lists pull requests as issues too; they are kept, and the
+        GraphQL backend samples both to match.
+        """
         params = {'state': state, 'per_page': 100}
-        return self._make_request(f"/repos/{owner}/{repo}/issues", params) or []
+        if since:
+            params['since'] = since
+        return list(self.iter_paginated(f"/repos/{owner}/{repo}/issues", params, limit))
     
-    def get_pull_requests(self, owner: str, repo: str, state: str = 'open') -> List[Dict]:
+    def get_pull_requests(self, owner: str, repo: str, state: str = 'open',
+                          limit: Optional[int] = None) -> List[Dict]:
         """Get repository pull requests"""
         params = {'state': state, 'per_page': 100}
-        return self._make_request(f"/repos/{owner}/{repo}/pulls", params) or []
+        return list(self.iter_paginated(f"/repos/{owner}/{repo}/pulls", params, limit))
+    
+    def get_first_comment_time(self, issue: Dict) -> Optional[str]:
+        """Get the creation time of an issue's first comment
+        
+        Only one comment is requested. The answer is cached per issue and
+        keyed by the issue's ``updated_at``, so it is fetched again only
+        after the issue changes.
+        """
+        if not needs_first_comment(issue):
+            return issue.get('first_comment_at')
+        
+        cache_key = first_comment_cache_key(issue)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached or None
+        
+        comments = self._make_request(issue['comments_url'], {'per_page': 1})
+        first_comment_at = read_first_comment(comments)
+        if comments is not None:
+            cache.set(cache_key, first_comment_at or '', settings.GITHUB_API_CACHE_RETENTION)
+        return first_comment_at
+    
+    def get_first_comment_times(self, issues: List[Dict]) -> Dict[int, Optional[str]]:
+        """Get the first comment time of several issues concurrently, keyed by issue number"""
+        return self.fetch_many({
+            issue['number']: (self.get_first_comment_time, issue)
+            for issue in issues
+        })
     
     def get_file_content(self, owner: str, repo: str, path: str) -> Optional[str]:
         """Get file content from repository"""
@@ -100,17 +1120,47 @@ class GitHubAPIService:
         data = self._make_request(f"/repos/{owner}/{repo}/contents/{path}")
         return data is not None
     
+    def get_repository_tree(self, owner: str, repo: str, ref: str = 'HEAD') -> Optional[RepositoryTree]:
+        """Get a case-insensitive path index of the whole tree at ``ref``"""
+        return tree_index(self._make_request(f"/repos/{owner}/{repo}/git/trees/{ref}", {'recursive': 1}))
+    
+    def check_files_exist(self, owner: str, repo: str, paths: List[str],
+                          tree: Optional[RepositoryTree] = None) -> Dict[str, bool]:
+        """Return a presence map for ``paths``
+        
+        Paths are answered from ``tree`` when given. Only paths the tree
+        cannot vouch for (no tree, or a miss in a truncated tree) are probed
+        through the contents API, concurrently.
+        """
+        present, unresolved = tree_presence(paths, tree)
+        present.update(self.fetch_many({
+            path: (self.check_file_exists, owner, repo, path)
+            for path in unresolved
+        }))
+        return present
+    
+    def get_statistics(self, owner: str, repo: str, name: str) -> Optional[Any]:
+        """Get one of the precomputed ``/stats`` resources (``commit_activity``, ...)
+        
+        GitHub answers ``202 Accepted`` until it has computed the resource.
+        The previous answer, if any, is returned meanwhile (``None``
+        otherwise) and the resource is polled in the background until it
+        is ready, so a later call finds it in the cache.
+        """
+        endpoint = statistics_endpoint(owner, repo, name)
+        return statistics_data(self._fetch_result(endpoint), endpoint, self.priority)
+    
     def get_commit_activity(self, owner: str, repo: str) -> List[Dict]:
-        """Get commit activity for the last year"""
-        return self._make_request(f"/repos/{owner}/{repo}/stats/commit_activity") or []
+        """Get commit activity for the last year (weekly totals with daily counts)"""
+        return self.get_statistics(owner, repo, 'commit_activity') or []
     
     def get_code_frequency(self, owner: str, repo: str) -> List[Dict]:
         """Get code frequency statistics"""
-        return self._make_request(f"/repos/{owner}/{repo}/stats/code_frequency") or []
+        return self.get_statistics(owner, repo, 'code_frequency') or []
     
     def get_participation(self, owner: str, repo: str) -> Dict:
         """Get participation statistics"""
-        return self._make_request(f"/repos/{owner}/{repo}/stats/participation") or {}
+        return self.get_statistics(owner, repo, 'participation') or {}
     
     def get_languages(self, owner: str, repo: str) -> Dict:
         """Get repository languages"""
@@ -121,19 +1171,17 @@ class GitHubAPIService:
         data = self._make_request(f"/repos/{owner}/{repo}/topics")
         return data.get('names', []) if data else []
     
-    def get_releases(self, owner: str, repo: str) -> List[Dict]:
+    def get_releases(self, owner: str, repo: str, limit: Optional[int] = None) -> List[Dict]:
         """Get repository releases"""
-        return self._make_request(f"/repos/{owner}/{repo}/releases") or []
+        return list(self.iter_paginated(f"/repos/{owner}/{repo}/releases", limit=limit))
     
-    def get_stargazers(self, owner: str, repo: str) -> List[Dict]:
-        """Get repository stargazers (limited to recent)"""
-        params = {'per_page': 100}
-        return self._make_request(f"/repos/{owner}/{repo}/stargazers", params) or []
+    def get_stargazers(self, owner: str, repo: str, limit: Optional[int] = 100) -> List[Dict]:
+        """Get repository stargazers (the first ``limit``; all of them when None)"""
+        return list(self.iter_paginated(f"/repos/{owner}/{repo}/stargazers", limit=limit))
     
-    def get_forks(self, owner: str, repo: str) -> List[Dict]:
-        """Get repository forks"""
-        params = {'per_page': 100}
-        return self._make_request(f"/repos/{owner}/{repo}/forks", params) or []
+    def get_forks(self, owner: str, repo: str, limit: Optional[int] = 100) -> List[Dict]:
+        """Get repository forks (the first ``limit``; all of them when None)"""
+        return list(self.iter_paginated(f"/repos/{owner}/{repo}/forks", limit=limit))
     
     def get_community_health(self, owner: str, repo: str) -> Dict:
         """Get community health metrics"""
@@ -153,4 +1201,12 @@ class GitHubAPIService:
     
     def get_traffic_popular_referrers(self, owner: str, repo: str) -> List[Dict]:
         """Get popular referrers (requires token)"""
-        return self._make_request(f"/repos/{owner}/{repo}/traffic/popular/referrers") or [] 
\ No newline at end of file
+        return self._make_request(f"/repos/{owner}/{repo}/traffic/popular/referrers") or []
+
+
+def create_github_service(priority: int = PRIORITY_INTERACTIVE) -> GitHubAPIService:
+    """Create the GitHub service for the backend selected by ``GITHUB_API_BACKEND``"""
+    if settings.GITHUB_API_BACKEND == 'graphql':
+        from .github_graphql import GitHubGraphQLService
+        return GitHubGraphQLService(priority=priority)
+    return GitHubAPIService(priority=priority)
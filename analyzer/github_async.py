@@ -0,0 +1,462 @@
+import asyncio
+import logging
+import time
+import weakref
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+from django.conf import settings
+from django.core.cache import cache
+
+from .github_api import (
+    API_HEADERS, COMMIT_WINDOW_DAYS, PULL_REQUEST_STATES, RESULT_NOT_FOUND, RESULT_OK, RESULT_PENDING,
+    RESULT_RATE_LIMITED, RESULT_TRANSIENT, APIResult, RepositoryStats, RepositoryTree,
+    RepositoryUnavailable, build_cache_entry, build_snapshot, cached_result, changed_calls,
+    classify_status, commit_activity_cache_key, conditional_headers, count_items, crawl_calls,
+    crawled_stats, first_comment_cache_key, first_page_params, graphql_cache_key, graphql_data,
+    has_fresh_data, is_refreshable, make_cache_key, merge_refresh, needs_first_comment,
+    needs_full_commits, negative_cache_entry, next_page_url, project, projection_for, read_first_comment,
+    read_total_count, refresh_calls, repository_data, result_entry, snapshot_key, statistics_data,
+    statistics_endpoint, total_count_query, tree_index, tree_presence, unwrap_stats, utc_timestamp,
+    window_start,
+)
+from .github_graphql import (
+    COMMIT_HISTORY_QUERY, build_profiles_query, commit_records, history_calls, next_history_variables,
+    normalize_profiles, profile_batches, profile_calls, read_batches, read_history, read_profiles,
+)
+from .event_loop import is_process_loop, on_shutdown
+from .rate_limit import PRIORITY_INTERACTIVE, RateLimitExceeded, get_scheduler, is_rate_limited
+from .singleflight import AsyncSingleFlight
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = (500, 502, 503, 504)
+
+# Concurrent cache misses for the same resource share one request, keyed by cache key
+_inflight_requests = AsyncSingleFlight()
+
+# One pooled client per event loop; an httpx.AsyncClient cannot be shared across loops.
+# ASGI views share the server loop's client, WSGI views and background work the one of
+# the process-wide loop (see event_loop.py).
+_clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]' = weakref.WeakKeyDictionary()
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the pooled HTTP client of the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        limits = httpx.Limits(
+            max_connections=settings.GITHUB_API_POOL_SIZE,
+            max_keepalive_connections=settings.GITHUB_API_POOL_SIZE,
+        )
+        client = httpx.AsyncClient(
+            transport=httpx.AsyncHTTPTransport(limits=limits, retries=settings.GITHUB_API_MAX_RETRIES),
+            timeout=httpx.Timeout(settings.GITHUB_API_READ_TIMEOUT, connect=settings.GITHUB_API_CONNECT_TIMEOUT),
+        )
+        _clients[loop] = client
+        if is_process_loop(loop):
+            on_shutdown(client.aclose)
+    return client
+
+
+class AsyncGitHubAPIService:
+    """asyncio counterpart of ``GitHubAPIService``
+
+    Shares the response cache (same keys and entry format), the path index
+    cache and the rate limit scheduler with the synchronous service, so
+    sync and async callers in one process reuse each other's work. Calls
+    wait on the network without holding a thread. Only the transport is
+    its own; what to request and how to read the answers comes from the
+    helpers in ``github_api`` and ``github_graphql`` both services share.
+    """
+
+    def __init__(self, priority: int = PRIORITY_INTERACTIVE, max_in_flight: Optional[int] = None):
+        self.base_url = settings.GITHUB_API_BASE_URL
+        self.headers = dict(API_HEADERS)
+        self.scheduler = get_scheduler()
+        self.priority = priority
+        # Optional cap on this service's own concurrent requests, shared by every
+        # analysis it runs (e.g. all repositories of one comparison)
+        self.budget = asyncio.Semaphore(max_in_flight) if max_in_flight else None
+
+    async def _send(self, url: str, headers: Dict, params: Dict = None,
+                    json_body: Dict = None) -> httpx.Response:
+        """Send a request within this service's budget"""
+        if self.budget is None:
+            return await self._send_scheduled(url, headers, params, json_body)
+        async with self.budget:
+            return await self._send_scheduled(url, headers, params, json_body)
+
+    async def _send_scheduled(self, url: str, headers: Dict, params: Dict = None,
+                              json_body: Dict = None) -> httpx.Response:
+        """Send a request through the rate limit scheduler, retrying 5xx and dropped connections"""
+        method = 'GET' if json_body is None else 'POST'
+        attempt = 0
+        rate_limited = 0
+        while True:
+            state = await self.scheduler.acquire_async(self.priority)
+            request_headers = dict(headers)
+            if state.token:
+                request_headers['Authorization'] = f'token {state.token}'
+            response = None
+            try:
+                response = await get_async_client().request(
+                    method, url, headers=request_headers, params=params, json=json_body
+                )
+            except httpx.TransportError:
+                if attempt >= settings.GITHUB_API_MAX_RETRIES:
+                    raise
+            finally:
+                self.scheduler.release(state, response)
+
+            if response is not None and is_rate_limited(response):
+                rate_limited += 1
+                if rate_limited > len(self.scheduler.tokens):
+                    raise RateLimitExceeded(max(state.blocked_until, time.time()))
+                continue
+            if response is not None and (response.status_code not in RETRY_STATUSES
+                                         or attempt >= settings.GITHUB_API_MAX_RETRIES):
+                return response
+            await asyncio.sleep(settings.GITHUB_API_BACKOFF_FACTOR * (2 ** attempt))
+            attempt += 1
+
+    async def _fetch(self, endpoint: str, params: Dict = None) -> Optional[Dict]:
+        """Fetch a GitHub API resource and return its cache entry (see ``GitHubAPIService._fetch``)"""
+        return result_entry(await self._fetch_result(endpoint, params))
+
+    async def _fetch_result(self, endpoint: str, params: Dict = None) -> APIResult:
+        """Fetch a GitHub API resource and classify the outcome (see ``GitHubAPIService._fetch_result``)"""
+        cache_key = make_cache_key(endpoint, params)
+        entry = await cache.aget(cache_key)
+        result = cached_result(entry)
+        if result is not None:
+            return result
+
+        return await _inflight_requests.do(cache_key, self._revalidate, cache_key, endpoint, params, entry)
+
+    async def _revalidate(self, cache_key: str, endpoint: str, params: Optional[Dict],
+                          entry: Optional[Dict]) -> APIResult:
+        """Fetch (or conditionally refetch) a resource and cache the outcome"""
+        url = endpoint if endpoint.startswith('http') else f"{self.base_url}{endpoint}"
+        headers = conditional_headers(self.headers, entry)
+
+        try:
+            response = await self._send(url, headers, params)
+            if response.status_code == 304 and entry:
+                entry['fetched_at'] = time.time()
+                await cache.aset(cache_key, entry, settings.GITHUB_API_CACHE_RETENTION)
+                return APIResult(RESULT_OK, entry)
+            if response.status_code == 202:
+                # The body is empty until GitHub has computed the resource, so it is not cached
+                return APIResult(RESULT_PENDING, entry)
+            if response.is_success:
+                entry = build_cache_entry(response, project(response.json(), projection_for(endpoint)))
+                await cache.aset(cache_key, entry, settings.GITHUB_API_CACHE_RETENTION)
+                return APIResult(RESULT_OK, entry)
+        except RateLimitExceeded as e:
+            return APIResult(RESULT_RATE_LIMITED, error=e)
+        except (httpx.HTTPError, ValueError) as e:
+            logger.error(f"GitHub API request failed: {e}")
+            return APIResult(RESULT_TRANSIENT, error=e)
+
+        status = classify_status(response.status_code)
+        if status == RESULT_NOT_FOUND:
+            logger.debug(f"GitHub API resource not found ({response.status_code}): {url}")
+            await cache.aset(cache_key, negative_cache_entry(status), settings.GITHUB_API_NEGATIVE_CACHE_TTL)
+        else:
+            logger.error(f"GitHub API request failed ({response.status_code}): {url}")
+        return APIResult(status)
+
+    async def _make_request(self, endpoint: str, params: Dict = None) -> Optional[Any]:
+        """Make a request to GitHub API with caching"""
+        entry = await self._fetch(endpoint, params)
+        return entry['data'] if entry else None
+
+    async def _graphql(self, query: str, variables: Dict = None) -> Optional[Dict]:
+        """Run a GraphQL v4 query and return its ``data`` (GraphQL requires a token)"""
+        if not self.scheduler.has_tokens:
+            return None
+
+        variables = variables or {}
+        cache_key = graphql_cache_key(query, variables)
+        cached = await cache.aget(cache_key)
+        if cached is not None:
+            return cached
+
+        return await _inflight_requests.do(cache_key, self._graphql_request, cache_key, query, variables)
+
+    async def _graphql_request(self, cache_key: str, query: str, variables: Dict) -> Optional[Dict]:
+        """Send a GraphQL query and cache its ``data``"""
+        try:
+            response = await self._send(f"{self.base_url}/graphql", self.headers,
+                                        json_body={'query': query, 'variables': variables})
+            response.raise_for_status()
+            payload = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            logger.error(f"GitHub GraphQL request failed: {e}")
+            return None
+
+        data = graphql_data(payload)
+        if data:
+            await cache.aset(cache_key, data, settings.GITHUB_API_CACHE_TTL)
+        return data
+
+    async def fetch_many(self, calls: Dict[Any, Tuple[Callable[..., Awaitable], ...]]) -> Dict[Any, Any]:
+        """Await independent calls concurrently and return their results by key
+        
+        Takes ``(coroutine function, *args)`` tuples like
+        ``GitHubAPIService.fetch_many``; at most ``GITHUB_API_MAX_CONCURRENCY``
+        calls are in flight at once.
+        """
+        semaphore = asyncio.Semaphore(max(1, settings.GITHUB_API_MAX_CONCURRENCY))
+
+        async def bounded(call):
+            async with semaphore:
+                return await call[0](*call[1:])
+
+        results = await asyncio.gather(*(bounded(call) for call in calls.values()))
+        return dict(zip(calls.keys(), results))
+
+    async def aiter_paginated(self, endpoint: str, params: Dict = None,
+                              limit: Optional[int] = None) -> AsyncIterator[Dict]:
+        """Yield the items of a list endpoint across all of its pages (see ``iter_paginated``)"""
+        params = first_page_params(params, limit)
+        if params is None:
+            return
+
+        upcoming = None
+        try:
+            entry = await self._fetch(endpoint, params)
+            yielded = 0
+            while entry and isinstance(entry['data'], list):
+                next_url = next_page_url(entry, yielded, limit)
+                upcoming = asyncio.ensure_future(self._fetch(next_url)) if next_url else None
+                for item in entry['data']:
+                    yield item
+                    yielded += 1
+                    if limit is not None and yielded >= limit:
+                        return
+                entry = await upcoming if upcoming else None
+        finally:
+            if upcoming is not None and not upcoming.done():
+                upcoming.cancel()
+
+    async def _collect(self, endpoint: str, params: Dict = None, limit: Optional[int] = None) -> List[Dict]:
+        return [item async for item in self.aiter_paginated(endpoint, params, limit)]
+
+    async def count(self, endpoint: str, params: Dict = None) -> Optional[int]:
+        """Count the items of a list endpoint without downloading them"""
+        return count_items(await self._fetch(endpoint, dict(params or {}, per_page=1)))
+
+    async def _graphql_total_count(self, owner: str, repo: str, connection: str) -> Optional[int]:
+        """Read ``totalCount`` of a repository connection through GraphQL"""
+        data = await self._graphql(total_count_query(connection), {'owner': owner, 'name': repo})
+        return read_total_count(data, connection)
+
+    async def count_contributors(self, owner: str, repo: str) -> Optional[int]:
+        """Count repository contributors"""
+        return await self.count(f"/repos/{owner}/{repo}/contributors")
+
+    async def count_pull_requests(self, owner: str, repo: str, state: str = 'open') -> Optional[int]:
+        """Count repository pull requests"""
+        total = await self.count(f"/repos/{owner}/{repo}/pulls", {'state': state})
+        if total is None:
+            total = await self._graphql_total_count(owner, repo, f"pullRequests(states: {PULL_REQUEST_STATES[state]})")
+        return total
+
+    async def count_releases(self, owner: str, repo: str) -> Optional[int]:
+        """Count repository releases"""
+        total = await self.count(f"/repos/{owner}/{repo}/releases")
+        if total is None:
+            total = await self._graphql_total_count(owner, repo, 'releases')
+        return total
+
+    async def get_repository(self, owner: str, repo: str) -> Optional[Dict]:
+        """Get basic repository information"""
+        return await self._make_request(f"/repos/{owner}/{repo}")
+
+    async def get_repository_result(self, owner: str, repo: str) -> APIResult:
+        """Get basic repository information along with why it failed, if it did (see ``APIResult``)"""
+        return await self._fetch_result(f"/repos/{owner}/{repo}")
+
+    async def get_recent_commits(self, owner: str, repo: str, days: int = 30,
+                                 limit: Optional[int] = None, since: Optional[str] = None) -> List[Dict]:
+        """Get recent commits from the last N days (or from ``since`` on)"""
+        return await self._collect(f"/repos/{owner}/{repo}/commits", {'since': since or window_start(days)}, limit)
+
+    async def get_issues(self, owner: str, repo: str, state: str = 'open',
+                         limit: Optional[int] = None, since: Optional[str] = None) -> List[Dict]:
+        """Get repository issues (only those updated from ``since`` on, if given)"""
+        params = {'state': state, 'per_page': 100}
+        if since:
+            params['since'] = since
+        return await self._collect(f"/repos/{owner}/{repo}/issues", params, limit)
+
+    async def get_statistics(self, owner: str, repo: str, name: str) -> Optional[Any]:
+        """Get one of the precomputed ``/stats`` resources (see ``GitHubAPIService.get_statistics``)
+
+        Pending resources are polled by the same background thread as in the
+        synchronous service, which fills the shared cache.
+        """
+        endpoint = statistics_endpoint(owner, repo, name)
+        return statistics_data(await self._fetch_result(endpoint), endpoint, self.priority)
+
+    async def get_languages(self, owner: str, repo: str) -> Dict:
+        """Get repository languages"""
+        return await self._make_request(f"/repos/{owner}/{repo}/languages") or {}
+
+    async def get_topics(self, owner: str, repo: str) -> List[str]:
+        """Get repository topics"""
+        data = await self._make_request(f"/repos/{owner}/{repo}/topics")
+        return data.get('names', []) if data else []
+
+    async def get_repository_tree(self, owner: str, repo: str, ref: str = 'HEAD') -> Optional[RepositoryTree]:
+        """Get a case-insensitive path index of the whole tree at ``ref``"""
+        return tree_index(await self._make_request(f"/repos/{owner}/{repo}/git/trees/{ref}", {'recursive': 1}))
+
+    async def check_file_exists(self, owner: str, repo: str, path: str) -> bool:
+        """Check if a file exists in the repository"""
+        data = await self._make_request(f"/repos/{owner}/{repo}/contents/{path}")
+        return data is not None
+
+    async def check_files_exist(self, owner: str, repo: str, paths: List[str],
+                                tree: Optional[RepositoryTree] = None) -> Dict[str, bool]:
+        """Return a presence map for ``paths`` (see ``GitHubAPIService.check_files_exist``)"""
+        present, unresolved = tree_presence(paths, tree)
+        present.update(await self.fetch_many({
+            path: (self.check_file_exists, owner, repo, path)
+            for path in unresolved
+        }))
+        return present
+
+    async def get_first_comment_time(self, issue: Dict) -> Optional[str]:
+        """Get the creation time of an issue's first comment (see ``GitHubAPIService``)"""
+        if not needs_first_comment(issue):
+            return issue.get('first_comment_at')
+
+        cache_key = first_comment_cache_key(issue)
+        cached = await cache.aget(cache_key)
+        if cached is not None:
+            return cached or None
+
+        comments = await self._make_request(issue['comments_url'], {'per_page': 1})
+        first_comment_at = read_first_comment(comments)
+        if comments is not None:
+            await cache.aset(cache_key, first_comment_at or '', settings.GITHUB_API_CACHE_RETENTION)
+        return first_comment_at
+
+    async def get_first_comment_times(self, issues: List[Dict]) -> Dict[int, Optional[str]]:
+        """Get the first comment time of several issues concurrently, keyed by issue number"""
+        return await self.fetch_many({
+            issue['number']: (self.get_first_comment_time, issue)
+            for issue in issues
+        })
+
+    async def get_repository_stats(self, owner: str, repo: str) -> Dict:
+        """Get comprehensive repository statistics (see ``GitHubAPIService.get_repository_stats``)"""
+        key = snapshot_key(owner, repo)
+        snapshot = await cache.aget(key)
+        synced_at = utc_timestamp(datetime.now(timezone.utc))
+
+        if is_refreshable(snapshot):
+            stats = await self._refresh_stats(owner, repo, snapshot)
+            built_at = snapshot['built_at']
+        else:
+            stats = await self._crawl_stats(owner, repo)
+            built_at = time.time()
+
+        if needs_full_commits(stats):
+            stats = dict(stats, recent_commits=await self.get_recent_commits(owner, repo, COMMIT_WINDOW_DAYS),
+                         commits_truncated=False)
+
+        if stats:
+            await cache.aset(key, build_snapshot(stats, synced_at, built_at), settings.GITHUB_API_CACHE_RETENTION)
+        return stats
+
+    async def _crawl_stats(self, owner: str, repo: str) -> Dict:
+        """Fetch every statistic of a repository from scratch (see ``crawl_calls``)"""
+        activity_cached = has_fresh_data(await cache.aget(commit_activity_cache_key(owner, repo)))
+        return crawled_stats(await self.fetch_many(crawl_calls(self, owner, repo, activity_cached)), activity_cached)
+
+    async def _refresh_stats(self, owner: str, repo: str, snapshot: Dict) -> Dict:
+        """Bring a repository snapshot up to date (see ``GitHubAPIService._refresh_stats``)"""
+        results = await self.fetch_many(refresh_calls(self, owner, repo, snapshot))
+        results['basic_info'] = repository_data(results['basic_info'])
+
+        calls, tree = changed_calls(self, owner, repo, snapshot, results)
+        changed = await self.fetch_many(calls)
+        return merge_refresh(snapshot, results, changed, changed.get('tree', tree))
+
+    @property
+    def stats_batch_size(self) -> int:
+        """Repositories ``get_repositories_stats`` fetches in one round trip (REST has no batching)"""
+        return 1
+
+    async def get_repositories_stats(self, repositories: List[Tuple[str, str]]) -> Dict[Tuple[str, str], RepositoryStats]:
+        """Get statistics for several ``(owner, repo)`` pairs concurrently (see ``GitHubAPIService.get_repositories_stats``)"""
+        return await self.fetch_many({
+            (owner, repo): (self._stats_or_unavailable, owner, repo)
+            for owner, repo in repositories
+        })
+
+    async def _stats_or_unavailable(self, owner: str, repo: str) -> RepositoryStats:
+        """``get_repository_stats``, returning rather than raising ``RepositoryUnavailable``"""
+        try:
+            return await self.get_repository_stats(owner, repo)
+        except RepositoryUnavailable as e:
+            return e
+
+
+class AsyncGitHubGraphQLService(AsyncGitHubAPIService):
+    """asyncio counterpart of ``GitHubGraphQLService``"""
+
+    @property
+    def stats_batch_size(self) -> int:
+        """Repositories one profile query loads (GraphQL needs a token, otherwise REST is used)"""
+        return max(1, settings.GITHUB_GRAPHQL_BATCH_SIZE) if self.scheduler.has_tokens else 1
+
+    async def get_repository_stats(self, owner: str, repo: str) -> Dict:
+        """Get comprehensive repository statistics"""
+        return unwrap_stats((await self.get_repositories_stats([(owner, repo)]))[(owner, repo)])
+
+    async def get_repositories_stats(self, repositories: List[Tuple[str, str]]) -> Dict[Tuple[str, str], RepositoryStats]:
+        """Get statistics for several repositories, batching them into few queries"""
+        if not self.scheduler.has_tokens:
+            return await super().get_repositories_stats(repositories)
+
+        batches = profile_batches(repositories)
+        results = await self.fetch_many(profile_calls(self, batches))
+        profiles, failed = read_batches(batches, results)
+        histories = await self.fetch_many(history_calls(self, profiles))
+        stats = await super().get_repositories_stats(failed) if failed else {}
+        stats.update(normalize_profiles(profiles, histories, results))
+        return stats
+
+    async def _query_profiles(self, repositories: List[Tuple[str, str]]) -> Optional[Dict[Tuple[str, str], Optional[Dict]]]:
+        """Fetch the profiles of ``repositories`` with one aliased query"""
+        data = await self._graphql(*build_profiles_query(repositories))
+        if data is None:
+            return None
+        return read_profiles(repositories, data)
+
+    async def _commit_history(self, owner: str, repo: str, profile: Dict) -> List[Dict]:
+        """Collect the last 30 days of commits, following history pages past the first"""
+        nodes = []
+        history = read_history(profile)
+        while history:
+            nodes.extend(history['nodes'])
+            variables = next_history_variables(owner, repo, history)
+            if variables is None:
+                break
+            history = read_history((await self._graphql(COMMIT_HISTORY_QUERY, variables) or {}).get('repository'))
+        return commit_records(nodes)
+
+
+def create_async_github_service(priority: int = PRIORITY_INTERACTIVE,
+                                max_in_flight: Optional[int] = None) -> AsyncGitHubAPIService:
+    """Create the asyncio GitHub service for the backend selected by ``GITHUB_API_BACKEND``"""
+    if settings.GITHUB_API_BACKEND == 'graphql':
+        return AsyncGitHubGraphQLService(priority=priority, max_in_flight=max_in_flight)
+    return AsyncGitHubAPIService(priority=priority, max_in_flight=max_in_flight)
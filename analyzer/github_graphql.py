@@ -0,0 +1,326 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+from .github_api import (
+    RESULT_NOT_FOUND, GitHubAPIService, RepositoryStats, RepositoryTree, RepositoryUnavailable, unwrap_stats,
+    window_start,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Everything RepositoryAnalyzer needs about one repository, in a single selection
+REPOSITORY_PROFILE_FRAGMENT = """
+fragment RepositoryProfile on Repository {
+  nameWithOwner
+  description
+  url
+  createdAt
+  updatedAt
+  pushedAt
+  stargazerCount
+  forkCount
+  primaryLanguage { name }
+  defaultBranchRef {
+    name
+    target {
+      ... on Commit {
+        history(since: $since, first: 100) {
+          pageInfo { hasNextPage endCursor }
+          nodes { oid author { date } }
+        }
+      }
+    }
+  }
+  openIssues: issues(states: OPEN) { totalCount }
+  issueSample: issues(states: OPEN, first: $issueSample, orderBy: {field: CREATED_AT, direction: DESC}) {
+    nodes {
+      number
+      createdAt
+      updatedAt
+      comments(first: 1) { totalCount nodes { createdAt } }
+    }
+  }
+  openPullRequests: pullRequests(states: OPEN) { totalCount }
+  pullRequestSample: pullRequests(states: OPEN, first: $issueSample, orderBy: {field: CREATED_AT, direction: DESC}) {
+    nodes {
+      number
+      createdAt
+      updatedAt
+      comments(first: 1) { totalCount nodes { createdAt } }
+    }
+  }
+  releases { totalCount }
+  repositoryTopics(first: 100) { nodes { topic { name } } }
+  languages(first: 100) { edges { size node { name } } }
+  rootTree: object(expression: "HEAD:") { ... on Tree { oid entries { name type } } }
+  githubTree: object(expression: "HEAD:.github") { ... on Tree { entries { name type } } }
+  docsTree: object(expression: "HEAD:docs") { ... on Tree { entries { name type } } }
+}
+"""
+
+COMMIT_HISTORY_QUERY = """
+query($owner: String!, $name: String!, $since: GitTimestamp!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    defaultBranchRef {
+      target {
+        ... on Commit {
+          history(since: $since, first: 100, after: $cursor) {
+            pageInfo { hasNextPage endCursor }
+            nodes { oid author { date } }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+
+def graphql_since(days: int = 30) -> str:
+    """Format the start of the commit window as a GitTimestamp (see ``window_start``)"""
+    return window_start(days)
+
+
+def issue_sample_size() -> int:
+    """Issues the response-time sample holds (GraphQL pages hold at most 100 nodes)"""
+    return min(100, max(1, settings.ANALYZER_RESPONSE_SAMPLE_SIZE))
+
+
+def profile_batches(repositories: List[Tuple[str, str]]) -> List[List[Tuple[str, str]]]:
+    """Split repositories into batches of ``GITHUB_GRAPHQL_BATCH_SIZE``, one query each"""
+    batch_size = max(1, settings.GITHUB_GRAPHQL_BATCH_SIZE)
+    return [repositories[i:i + batch_size] for i in range(0, len(repositories), batch_size)]
+
+
+def profile_calls(service, batches: List[List[Tuple[str, str]]]) -> Dict:
+    """Calls fetching every batch's profiles and each repository's contributor count
+    
+    In the form ``fetch_many`` takes; results are keyed by batch index and
+    by repository. ``service`` may be sync or async.
+    """
+    calls = {index: (service._query_profiles, batch) for index, batch in enumerate(batches)}
+    calls.update({
+        repository: (service.count_contributors, *repository)
+        for batch in batches for repository in batch
+    })
+    return calls
+
+
+def read_batches(batches: List[List[Tuple[str, str]]],
+                 results: Dict) -> Tuple[Dict[Tuple[str, str], Optional[Dict]], List[Tuple[str, str]]]:
+    """Split the results of ``profile_calls`` into profiles (None for a missing repository)
+    and the repositories of batches whose query failed"""
+    profiles = {}
+    failed = []
+    for index, batch in enumerate(batches):
+        if results[index] is None:
+            failed.extend(batch)
+        else:
+            profiles.update((repository, results[index].get(repository)) for repository in batch)
+    return profiles, failed
+
+
+def history_calls(service, profiles: Dict[Tuple[str, str], Optional[Dict]]) -> Dict:
+    """Calls collecting the commit history of every profile found (see ``profile_calls``)"""
+    return {
+        (owner, repo): (service._commit_history, owner, repo, profile)
+        for (owner, repo), profile in profiles.items() if profile
+    }
+
+
+def normalize_profiles(profiles: Dict[Tuple[str, str], Optional[Dict]], histories: Dict,
+                       results: Dict) -> Dict[Tuple[str, str], RepositoryStats]:
+    """Convert the profiles read by ``read_batches`` to REST-shaped stats
+    
+    GraphQL answers ``null`` both for missing repositories and for ones the
+    token may not see (as REST answers 404), so those are not found.
+    """
+    return {
+        (owner, repo): normalize_profile(owner, repo, profile, histories.get((owner, repo), []),
+                                         results[(owner, repo)])
+        if profile else RepositoryUnavailable(RESULT_NOT_FOUND)
+        for (owner, repo), profile in profiles.items()
+    }
+
+
+def build_profiles_query(repositories: List[Tuple[str, str]]) -> Tuple[str, Dict]:
+    """Build one aliased query (``r0``, ``r1``, ...) for the profiles of ``repositories``"""
+    definitions = ['$since: GitTimestamp!', '$issueSample: Int!']
+    selections = []
+    variables = {
+        'since': graphql_since(),
+        'issueSample': issue_sample_size(),
+    }
+    for index, (owner, repo) in enumerate(repositories):
+        definitions.append(f'$owner{index}: String!, $name{index}: String!')
+        selections.append(
+            f'r{index}: repository(owner: $owner{index}, name: $name{index}) {{ ...RepositoryProfile }}'
+        )
+        variables[f'owner{index}'] = owner
+        variables[f'name{index}'] = repo
+
+    query = (
+        f"query({', '.join(definitions)}) {{\n  " + '\n  '.join(selections) + "\n}\n"
+        + REPOSITORY_PROFILE_FRAGMENT
+    )
+    return query, variables
+
+
+def read_profiles(repositories: List[Tuple[str, str]], data: Dict) -> Dict[Tuple[str, str], Optional[Dict]]:
+    """Map the aliased results of ``build_profiles_query`` back to their repositories"""
+    return {repository: data.get(f'r{index}') for index, repository in enumerate(repositories)}
+
+
+def read_history(data: Optional[Dict]) -> Optional[Dict]:
+    """Extract the default-branch commit history from a repository selection"""
+    try:
+        return data['defaultBranchRef']['target']['history']
+    except (TypeError, KeyError):
+        return None
+
+
+def next_history_variables(owner: str, repo: str, history: Dict) -> Optional[Dict]:
+    """Variables of the ``COMMIT_HISTORY_QUERY`` for the page after ``history``, or None on the last page"""
+    if not history['pageInfo']['hasNextPage']:
+        return None
+    return {
+        'owner': owner, 'name': repo, 'since': graphql_since(),
+        'cursor': history['pageInfo']['endCursor'],
+    }
+
+
+def commit_records(nodes: List[Dict]) -> List[Dict]:
+    """Convert commit history nodes to REST-shaped commit records"""
+    return [
+        {'sha': node['oid'], 'commit': {'author': {'date': (node.get('author') or {}).get('date')}}}
+        for node in nodes
+    ]
+
+
+def community_tree(profile: Dict) -> Optional[RepositoryTree]:
+    """Index the root, ``.github`` and ``docs`` directories of the default branch"""
+    root = profile.get('rootTree')
+    if not root:
+        return None
+
+    entries = [{'path': entry['name'], 'type': entry['type']} for entry in root['entries']]
+    for prefix, alias in (('.github', 'githubTree'), ('docs', 'docsTree')):
+        subtree = profile.get(alias) or {}
+        entries.extend(
+            {'path': f"{prefix}/{entry['name']}", 'type': entry['type']}
+            for entry in subtree.get('entries', [])
+        )
+    # Only part of the tree is indexed, so keep it out of the SHA-keyed full-tree cache
+    return RepositoryTree(root['oid'], entries)
+
+
+def normalize_profile(owner: str, repo: str, profile: Optional[Dict], commits: List[Dict],
+                      contributors_count: Optional[int]) -> Optional[Dict]:
+    """Convert a GraphQL repository profile to the REST-shaped stats dict"""
+    if not profile:
+        return None
+
+    open_issues = profile['openIssues']['totalCount']
+    open_pulls = profile['openPullRequests']['totalCount']
+    basic_info = {
+        'full_name': profile['nameWithOwner'],
+        'description': profile.get('description'),
+        'html_url': profile['url'],
+        'created_at': profile['createdAt'],
+        'updated_at': profile['updatedAt'],
+        'pushed_at': profile['pushedAt'],
+        'stargazers_count': profile['stargazerCount'],
+        # REST reports stargazers as watchers_count; keep the same meaning
+        'watchers_count': profile['stargazerCount'],
+        'forks_count': profile['forkCount'],
+        # REST counts open pull requests as open issues too
+        'open_issues_count': open_issues + open_pulls,
+        'language': (profile.get('primaryLanguage') or {}).get('name'),
+        'default_branch': (profile.get('defaultBranchRef') or {}).get('name'),
+    }
+
+    # REST lists open pull requests as issues too, so the response-time sample
+    # takes the newest open issues and pull requests together, as ``/issues`` does
+    nodes = sorted(profile['issueSample']['nodes'] + profile['pullRequestSample']['nodes'],
+                   key=lambda node: node['createdAt'], reverse=True)[:issue_sample_size()]
+    issues = []
+    for node in nodes:
+        comments = node['comments']
+        first_comment = comments['nodes'][0]['createdAt'] if comments['nodes'] else None
+        issues.append({
+            'number': node['number'],
+            'created_at': node['createdAt'],
+            'updated_at': node['updatedAt'],
+            'comments': comments['totalCount'],
+            'comments_url': f"{settings.GITHUB_API_BASE_URL}/repos/{owner}/{repo}/issues/{node['number']}/comments",
+            'first_comment_at': first_comment,
+        })
+
+    return {
+        'basic_info': basic_info,
+        'recent_commits': commits,
+        'issues': issues,
+        'topics': [node['topic']['name'] for node in profile['repositoryTopics']['nodes']],
+        'languages': {edge['node']['name']: edge['size'] for edge in profile['languages']['edges']},
+        'tree': community_tree(profile),
+        'counts': {
+            'contributors': contributors_count or 0,
+            'open_pulls': open_pulls,
+            'releases': profile['releases']['totalCount'],
+            'open_issues': basic_info['open_issues_count'],
+        },
+    }
+
+
+class GitHubGraphQLService(GitHubAPIService):
+    """GitHub service that loads repository profiles through the GraphQL v4 API
+
+    ``get_repository_stats`` issues one query per repository (and
+    ``get_repositories_stats`` one query per ``GITHUB_GRAPHQL_BATCH_SIZE``
+    repositories) instead of a dozen REST calls, and returns the same
+    normalized dict as the REST implementation. GraphQL has no contributor
+    count, so that total still comes from one small REST call. Without a
+    token, or when a query fails, it falls back to REST.
+    """
+
+    def get_repository_stats(self, owner: str, repo: str) -> Dict:
+        """Get comprehensive repository statistics"""
+        return unwrap_stats(self.get_repositories_stats([(owner, repo)])[(owner, repo)])
+
+    def get_repositories_stats(self, repositories: List[Tuple[str, str]]) -> Dict[Tuple[str, str], RepositoryStats]:
+        """Get statistics for several repositories, batching them into few queries
+        
+        Repositories of a batch whose query failed are fetched through REST.
+        """
+        if not self.scheduler.has_tokens:
+            return super().get_repositories_stats(repositories)
+
+        batches = profile_batches(repositories)
+        results = self.fetch_many(profile_calls(self, batches))
+        profiles, failed = read_batches(batches, results)
+        histories = self.fetch_many(history_calls(self, profiles))
+        stats = super().get_repositories_stats(failed) if failed else {}
+        stats.update(normalize_profiles(profiles, histories, results))
+        return stats
+
+    def _query_profiles(self, repositories: List[Tuple[str, str]]) -> Optional[Dict[Tuple[str, str], Optional[Dict]]]:
+        """Fetch the profiles of ``repositories`` with one aliased query"""
+        data = self._graphql(*build_profiles_query(repositories))
+        if data is None:
+            return None
+        return read_profiles(repositories, data)
+
+    def _commit_history(self, owner: str, repo: str, profile: Dict) -> List[Dict]:
+        """Collect the last 30 days of commits, following history pages past the first"""
+        nodes = []
+        history = read_history(profile)
+        while history:
+            nodes.extend(history['nodes'])
+            variables = next_history_variables(owner, repo, history)
+            if variables is None:
+                break
+            history = read_history((self._graphql(COMMIT_HISTORY_QUERY, variables) or {}).get('repository'))
+        return commit_records(nodes)
@@ -0,0 +1,117 @@
+import copy
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import event_loop
+from .analysis_service import dedupe_repositories, get_analyzer
+from .rate_limit import PRIORITY_BATCH
+
+logger = logging.getLogger(__name__)
+
+JOB_ANALYSIS = 'analysis'
+JOB_COMPARISON = 'comparison'
+JOB_KINDS = (JOB_ANALYSIS, JOB_COMPARISON)
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_SUCCEEDED = 'succeeded'
+STATUS_FAILED = 'failed'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the process-wide pool that runs jobs"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.ANALYZER_JOB_WORKERS, thread_name_prefix='analysis-job'
+                )
+    return _executor
+
+
+def job_cache_key(job_id: str) -> str:
+    return f"job:{job_id}"
+
+
+def get_job(job_id: str) -> Optional[Dict]:
+    """Return a job's state, or None once it expired (or never existed)"""
+    return cache.get(job_cache_key(job_id))
+
+
+def save_job(job: Dict):
+    cache.set(job_cache_key(job['id']), job, settings.ANALYZER_JOB_TTL)
+
+
+def submit_job(kind: str, repositories: List[Tuple[str, str]]) -> Dict:
+    """Queue an analysis (one repository) or comparison job and return its initial state
+
+    Jobs run on a local pool of ``ANALYZER_JOB_WORKERS`` threads and their
+    state, including the result, is kept in the cache for
+    ``ANALYZER_JOB_TTL`` seconds after the last update. Pollers on other
+    workers only see it with a shared cache (``CACHE_URL``).
+    """
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    repositories = dedupe_repositories(repositories)
+    job = {
+        'id': uuid.uuid4().hex,
+        'kind': kind,
+        'status': STATUS_QUEUED,
+        'repositories': [{'owner': owner, 'repo': repo} for owner, repo in repositories],
+        'progress': {'done': 0, 'total': len(repositories)},
+        'result': None,
+        'error': None,
+        'created_at': time.time(),
+        'started_at': None,
+        'finished_at': None,
+    }
+    save_job(job)
+    # The worker updates its own copy, so the caller's snapshot stays consistent
+    get_executor().submit(run_job, copy.deepcopy(job))
+    return job
+
+
+def run_job(job: Dict):
+    """Run a queued job, recording its progress and outcome"""
+    job.update(status=STATUS_RUNNING, started_at=time.time())
+    save_job(job)
+    try:
+        repositories = [(item['owner'], item['repo']) for item in job['repositories']]
+        if job['kind'] == JOB_ANALYSIS:
+            owner, repo = repositories[0]
+            result = get_analyzer().analyze_repository(owner, repo)
+            job['progress']['done'] = 1
+            if 'error' in result:
+                job.update(status=STATUS_FAILED, error=result['error'], result=result)
+            else:
+                job.update(status=STATUS_SUCCEEDED, result=result)
+        else:
+            job.update(status=STATUS_SUCCEEDED, result=event_loop.run(_run_comparison(job, repositories)))
+    except Exception as e:
+        logger.error(f"Job {job['id']} failed: {e}")
+        job.update(status=STATUS_FAILED, error=f'Job failed: {str(e)}')
+    job['finished_at'] = time.time()
+    save_job(job)
+
+
+async def _run_comparison(job: Dict, repositories: List[Tuple[str, str]]) -> List[Dict]:
+    """Analyze the repositories of a comparison job, updating its progress as each finishes"""
+    analyzer = get_analyzer(PRIORITY_BATCH)
+    entries = {}
+    async for entry in analyzer.astream_analyses(repositories, timeout=settings.ANALYZER_JOB_TIMEOUT):
+        entries[(entry['owner'], entry['repo'])] = entry
+        job['progress']['done'] = len(entries)
+        await cache.aset(job_cache_key(job['id']), job, settings.ANALYZER_JOB_TTL)
+    # Report in submission order rather than completion order
+    return [entries[repository] for repository in repositories]
@@ -0,0 +1,78 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter, so every run pays the full cold-start cost
+PROBE = r'''
+import json, sys, time
+started = time.perf_counter()
+from github_analyzer.wsgi import application
+import analyzer.views
+imported = time.perf_counter()
+
+from wsgiref.util import setup_testing_defaults
+environ = {'PATH_INFO': sys.argv[1], 'HTTP_HOST': 'localhost'}
+setup_testing_defaults(environ)
+statuses = []
+b''.join(application(environ, lambda status, headers, exc_info=None: statuses.append(status)))
+answered = time.perf_counter()
+
+print(json.dumps({
+    'import_seconds': imported - started,
+    'first_request_seconds': answered - imported,
+    'status': statuses[0],
+    'heavy_modules': sorted(name for name in ('numpy', 'pandas', 'sklearn') if name in sys.modules),
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure cold-start cost: the time to import the project and to answer '
+        'its first request, each in a fresh interpreter'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to measure (default: 5)')
+        parser.add_argument('--path', default='/', help='Path of the first request (default: /)')
+        parser.add_argument('--output', help='Also write the measurements to this JSON file')
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1:
+            raise CommandError('--runs must be at least 1')
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get(
+            'DJANGO_SETTINGS_MODULE', 'github_analyzer.settings'
+        ))
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(settings.BASE_DIR), env.get('PYTHONPATH')]))
+
+        runs = []
+        for _ in range(options['runs']):
+            probe = subprocess.run(
+                [sys.executable, '-c', PROBE, options['path']],
+                capture_output=True, text=True, env=env, cwd=settings.BASE_DIR,
+            )
+            if probe.returncode != 0:
+                raise CommandError(f"Startup probe failed:\n{probe.stderr}")
+            runs.append(json.loads(probe.stdout.strip().splitlines()[-1]))
+
+        summary = {'path': options['path'], 'runs': runs}
+        for metric in ('import_seconds', 'first_request_seconds'):
+            values = [run[metric] for run in runs]
+            summary[metric] = {'median': statistics.median(values), 'min': min(values), 'max': max(values)}
+            self.stdout.write(
+                f"{metric}: median {summary[metric]['median'] * 1000:.0f} ms "
+                f"(min {summary[metric]['min'] * 1000:.0f}, max {summary[metric]['max'] * 1000:.0f})"
+            )
+        self.stdout.write(f"first response: {runs[0]['status']}")
+        heavy = runs[0]['heavy_modules']
+        if heavy:
+            self.stdout.write(self.style.WARNING(f"Heavy modules loaded at startup: {', '.join(heavy)}"))
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(summary, f, indent=2)
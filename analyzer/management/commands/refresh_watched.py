@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from analyzer.watch import WatchScheduler, load_watchlist
+
+
+class Command(BaseCommand):
+    help = (
+        'Keep the analyses of the repositories in a watchlist fresh, refreshing '
+        'active repositories more often than quiet ones within an hourly API budget'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--watchlist', default=settings.ANALYZER_WATCHLIST,
+            help='File with one owner/repo or GitHub URL per line (default: ANALYZER_WATCHLIST)',
+        )
+        parser.add_argument(
+            '--budget', type=int, default=settings.ANALYZER_REFRESH_BUDGET,
+            help='GitHub requests the refresher may spend per hour (default: ANALYZER_REFRESH_BUDGET)',
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=settings.ANALYZER_REFRESH_CONCURRENCY,
+            help='Repositories refreshed at the same time (default: ANALYZER_REFRESH_CONCURRENCY)',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Refresh the repositories that are due now, then exit (e.g. from cron)',
+        )
+
+    def handle(self, *args, **options):
+        if options['budget'] < 1:
+            raise CommandError('--budget must be at least 1 request per hour')
+        try:
+            repositories = load_watchlist(options['watchlist'])
+        except OSError as e:
+            raise CommandError(f"Could not read watchlist {options['watchlist']}: {e}")
+        if not repositories:
+            raise CommandError(f"Watchlist {options['watchlist']} lists no repositories")
+
+        self.stdout.write(f"Watching {len(repositories)} repositories "
+                          f"with a budget of {options['budget']} requests per hour")
+        scheduler = WatchScheduler(repositories, options['budget'], options['concurrency'])
+        try:
+            stats = scheduler.run(once=options['once'])
+        except KeyboardInterrupt:
+            stats = scheduler.stats
+        self.stdout.write(self.style.SUCCESS(
+            f"Refreshed {stats['refreshed']} repositories ({stats['failed']} failed, "
+            f"{stats['rate_limited']} rate limited) using {stats['requests']} requests"
+        ))
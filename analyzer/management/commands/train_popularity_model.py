@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from analyzer import store
+
+# Fewer samples than this cannot give a meaningful fit
+MIN_SAMPLES = 20
+
+
+class Command(BaseCommand):
+    help = (
+        'Fit the popularity-growth model on stored analysis history (or a CSV '
+        'dataset) and save it as the next versioned artifact'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dataset',
+            help='CSV file with stars, forks, open_issues, maintainer_activity_score, '
+                 'contribution_guide_score and star_growth columns (default: the analysis history)',
+        )
+        parser.add_argument(
+            '--min-days', type=float, default=7,
+            help='Shortest gap between two history snapshots used as a sample (default: 7)',
+        )
+        parser.add_argument('--alpha', type=float, default=1.0, help='Ridge regularization strength (default: 1.0)')
+        parser.add_argument(
+            '--output', default=settings.POPULARITY_MODEL_PATH,
+            help='Directory holding the numbered artifacts (default: POPULARITY_MODEL_PATH)',
+        )
+
+    def handle(self, *args, **options):
+        from analyzer.popularity_model import csv_dataset, fit, history_dataset, save_version
+
+        if options['dataset']:
+            source = options['dataset']
+            try:
+                features, targets = csv_dataset(source)
+            except (OSError, KeyError, ValueError) as e:
+                raise CommandError(f"Could not read dataset {source}: {e}")
+        else:
+            if not store.is_enabled():
+                raise CommandError('Training on history needs the analysis store (ANALYSIS_STORE_ENABLED), or pass --dataset')
+            source = 'analysis history'
+            try:
+                features, targets = history_dataset(options['min_days'])
+            except DatabaseError as e:
+                raise CommandError(f"Could not read analysis history: {e}")
+
+        if len(targets) < MIN_SAMPLES:
+            raise CommandError(f"Only {len(targets)} samples in {source}; at least {MIN_SAMPLES} are needed")
+
+        model = fit(features, targets, alpha=options['alpha'], source=source)
+        path = save_version(model, options['output'])
+        r2 = model.meta['holdout_r2']
+        self.stdout.write(self.style.SUCCESS(
+            f"Saved popularity model v{model.version} to {path} "
+            f"({len(targets)} samples, holdout R² {'n/a' if r2 is None else f'{r2:.3f}'})"
+        ))
+        self.stdout.write('Restart the application workers to load the new model.')
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:47
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RepositoryAnalysis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('owner', models.CharField(max_length=100)),
+                ('repo_name', models.CharField(max_length=100)),
+                ('full_name', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('stars', models.IntegerField(default=0)),
+                ('forks', models.IntegerField(default=0)),
+                ('watchers', models.IntegerField(default=0)),
+                ('open_issues', models.IntegerField(default=0)),
+                ('open_pulls', models.IntegerField(default=0)),
+                ('popularity_score', models.FloatField(default=0.0)),
+                ('maintainer_activity_score', models.FloatField(default=0.0)),
+                ('contribution_guide_score', models.FloatField(default=0.0)),
+                ('overall_score', models.FloatField(default=0.0)),
+                ('popularity_prediction', models.TextField(blank=True, null=True)),
+                ('maintainer_activity_analysis', models.TextField(blank=True, null=True)),
+                ('contribution_guide_analysis', models.TextField(blank=True, null=True)),
+                ('recommendations', models.TextField(blank=True, null=True)),
+                ('language', models.CharField(blank=True, max_length=100, null=True)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('analysis_version', models.IntegerField(default=0)),
+                ('last_commit_date', models.DateTimeField(blank=True, null=True)),
+                ('analyzed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Repository Analyses',
+                'indexes': [models.Index(fields=['overall_score'], name='analyzer_re_overall_3a8af6_idx'), models.Index(fields=['analyzed_at'], name='analyzer_re_analyze_7146df_idx')],
+                'unique_together': {('owner', 'repo_name')},
+            },
+        ),
+        migrations.CreateModel(
+            name='AnalysisHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stars', models.IntegerField()),
+                ('forks', models.IntegerField()),
+                ('open_issues', models.IntegerField()),
+                ('popularity_score', models.FloatField()),
+                ('maintainer_activity_score', models.FloatField()),
+                ('contribution_guide_score', models.FloatField()),
+                ('overall_score', models.FloatField()),
+                ('analyzed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('repository', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='analyzer.repositoryanalysis')),
+            ],
+            options={
+                'verbose_name_plural': 'Analysis Histories',
+                'ordering': ['-analyzed_at'],
+                'indexes': [models.Index(fields=['repository', 'analyzed_at'], name='analyzer_an_reposit_9441c3_idx'), models.Index(fields=['analyzed_at'], name='analyzer_an_analyze_e163d6_idx')],
+            },
+        ),
+    ]
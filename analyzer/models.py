@@ -28,13 +28,25 @@ class RepositoryAnalysis(models.Model):
     contribution_guide_analysis = models.TextField(blank=True, null=True)
     recommendations = models.TextField(blank=True, null=True)
     
+    language = models.CharField(max_length=100, blank=True, null=True)
+    
+    # Complete result of the latest analysis, served for repeat views
+    result = models.JSONField(blank=True, null=True)
+    analysis_version = models.IntegerField(default=0)
+    
     # Metadata
     last_commit_date = models.DateTimeField(blank=True, null=True)
+    analyzed_at = models.DateTimeField(default=timezone.now)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
+        # owner and repo_name are stored lowercased; the unique constraint doubles as their lookup index
         unique_together = ['owner', 'repo_name']
+        indexes = [
+            models.Index(fields=['overall_score']),
+            models.Index(fields=['analyzed_at']),
+        ]
         verbose_name_plural = 'Repository Analyses'
     
     def __str__(self):
@@ -60,6 +72,10 @@ class AnalysisHistory(models.Model):
     class Meta:
         verbose_name_plural = 'Analysis Histories'
         ordering = ['-analyzed_at']
+        indexes = [
+            models.Index(fields=['repository', 'analyzed_at']),
+            models.Index(fields=['analyzed_at']),
+        ]
     
     def __str__(self):
         return f"{self.repository.full_name} - {self.analyzed_at.strftime('%Y-%m-%d')}" 
\ No newline at end of file
@@ -0,0 +1,214 @@
+import csv
+import json
+import math
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Layout of the files in an artifact directory; bump when it changes
+ARTIFACT_FORMAT = 1
+COEFFICIENTS_FILE = 'coefficients.npy'
+META_FILE = 'model.json'
+
+# Model inputs, in order, and the result fields they come from
+FEATURES = ['log_stars', 'log_forks', 'log_open_issues', 'maintainer_activity_score', 'contribution_guide_score']
+LOG_FEATURES = {'log_stars': 'stars', 'log_forks': 'forks', 'log_open_issues': 'open_issues'}
+
+# Growth is predicted over this many days
+HORIZON_DAYS = 30
+
+# Labels for predicted growth below the 25th, 50th and 75th percentile of the training data, and above
+GROWTH_LABELS = [
+    "Low growth potential",
+    "Moderate growth potential",
+    "Growing popularity",
+    "High growth potential",
+]
+THRESHOLD_QUANTILES = [0.25, 0.5, 0.75]
+
+
+def feature_row(stars: float, forks: float, open_issues: float,
+                activity_score: float, contribution_score: float) -> List[float]:
+    """Model inputs of one repository, in ``FEATURES`` order"""
+    return [math.log1p(stars), math.log1p(forks), math.log1p(open_issues), activity_score, contribution_score]
+
+
+def feature_matrix(columns: Dict[str, Sequence[float]]) -> np.ndarray:
+    """Model inputs of N repositories from columns named like result fields"""
+    return np.column_stack([
+        np.log1p(np.asarray(columns[LOG_FEATURES[name]], dtype=np.float64)) if name in LOG_FEATURES
+        else np.asarray(columns[name], dtype=np.float64)
+        for name in FEATURES
+    ])
+
+
+class PopularityModel:
+    """Ridge regression of the log star growth over the next ``HORIZON_DAYS`` days
+
+    The fitted arrays live in ``coefficients.npy`` (rows: feature means,
+    scales and coefficients) and are memory-mapped on load, so every
+    worker process shares the same pages. ``predict`` scores a whole
+    feature matrix and ``predict_one`` a single repository in plain Python,
+    adding the terms in the same order.
+    """
+
+    def __init__(self, coefficients: np.ndarray, meta: Dict):
+        self.coefficients = coefficients
+        self.meta = meta
+        self.version = meta['version']
+        self.intercept = meta['intercept']
+        self.thresholds = meta['thresholds']
+        # Per-repository predictions are faster on Python floats than on tiny arrays
+        self._terms = list(zip(*(row.tolist() for row in coefficients)))
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """Predicted log growth of each row of ``features``"""
+        total = np.zeros(len(features))
+        for index, (mean, scale, coefficient) in enumerate(self._terms):
+            total = total + (features[:, index] - mean) / scale * coefficient
+        return total + self.intercept
+
+    def predict_one(self, features: Sequence[float]) -> float:
+        """Predicted log growth of one repository"""
+        total = 0.0
+        for value, (mean, scale, coefficient) in zip(features, self._terms):
+            total = total + (value - mean) / scale * coefficient
+        return total + self.intercept
+
+    def describe(self, growth: float) -> str:
+        """Human-readable prediction for a predicted log growth"""
+        label = GROWTH_LABELS[sum(growth >= threshold for threshold in self.thresholds)]
+        return f"{label} - Model expects {math.expm1(growth) * 100:+.1f}% stars over the next {HORIZON_DAYS} days"
+
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, COEFFICIENTS_FILE), np.asarray(self.coefficients))
+        with open(os.path.join(path, META_FILE), 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> 'PopularityModel':
+        with open(os.path.join(path, META_FILE), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('format') != ARTIFACT_FORMAT or meta.get('features') != FEATURES:
+            raise ValueError(f"Incompatible popularity model artifact at {path}")
+        return cls(np.load(os.path.join(path, COEFFICIENTS_FILE), mmap_mode='r'), meta)
+
+
+def artifact_versions(root: str) -> List[int]:
+    """Versions of the artifacts saved under ``root`` (one numbered directory each)"""
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        int(name) for name in os.listdir(root)
+        if name.isdigit() and os.path.isfile(os.path.join(root, name, META_FILE))
+    )
+
+
+def load_latest(root: str) -> Optional[PopularityModel]:
+    """Load the newest artifact under ``root``, if any"""
+    versions = artifact_versions(root)
+    if not versions:
+        return None
+    return PopularityModel.load(os.path.join(root, str(versions[-1])))
+
+
+def fit(features: np.ndarray, targets: np.ndarray, alpha: float = 1.0, source: str = '',
+        holdout: float = 0.2, seed: int = 0) -> PopularityModel:
+    """Fit a ridge regression on standardized features
+
+    A random ``holdout`` share of the samples is kept out of the fit to
+    report the model's R² on unseen repositories; the final model is then
+    refitted on every sample.
+    """
+    def solve(x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, float]:
+        mean = x.mean(axis=0)
+        scale = x.std(axis=0)
+        scale[scale == 0] = 1.0
+        z = (x - mean) / scale
+        intercept = float(y.mean())
+        coefficients = np.linalg.solve(z.T @ z + alpha * np.eye(z.shape[1]), z.T @ (y - intercept))
+        return mean, scale, coefficients, intercept
+
+    order = np.random.default_rng(seed).permutation(len(targets))
+    test, train = order[:int(len(order) * holdout)], order[int(len(order) * holdout):]
+    r2 = None
+    if len(test) >= 2:
+        mean, scale, coefficients, intercept = solve(features[train], targets[train])
+        predicted = ((features[test] - mean) / scale) @ coefficients + intercept
+        residual = ((targets[test] - predicted) ** 2).sum()
+        spread = ((targets[test] - targets[test].mean()) ** 2).sum()
+        r2 = float(1 - residual / spread) if spread else None
+
+    mean, scale, coefficients, intercept = solve(features, targets)
+    predicted = ((features - mean) / scale) @ coefficients + intercept
+    meta = {
+        'format': ARTIFACT_FORMAT,
+        'version': None,
+        'features': FEATURES,
+        'intercept': intercept,
+        'thresholds': np.quantile(predicted, THRESHOLD_QUANTILES).tolist(),
+        'horizon_days': HORIZON_DAYS,
+        'alpha': alpha,
+        'samples': int(len(targets)),
+        'holdout_r2': r2,
+        'source': source,
+        'trained_at': datetime.now(timezone.utc).isoformat(),
+    }
+    return PopularityModel(np.vstack([mean, scale, coefficients]), meta)
+
+
+def save_version(model: PopularityModel, root: str) -> str:
+    """Save ``model`` as the next numbered artifact under ``root`` and return its path"""
+    versions = artifact_versions(root)
+    model.version = model.meta['version'] = (versions[-1] + 1) if versions else 1
+    path = os.path.join(root, str(model.version))
+    model.save(path)
+    return path
+
+
+def history_dataset(min_days: float = 7) -> Tuple[np.ndarray, np.ndarray]:
+    """Training samples from consecutive ``AnalysisHistory`` snapshots of each repository
+
+    Each pair at least ``min_days`` apart yields the features of the earlier
+    snapshot and the log star growth between them, scaled to ``HORIZON_DAYS``.
+    """
+    from .models import AnalysisHistory
+
+    rows, targets = [], []
+    previous = None
+    snapshots = AnalysisHistory.objects.order_by('repository_id', 'analyzed_at').values_list(
+        'repository_id', 'analyzed_at', 'stars', 'forks', 'open_issues',
+        'maintainer_activity_score', 'contribution_guide_score',
+    )
+    for snapshot in snapshots.iterator():
+        if previous is not None and previous[0] == snapshot[0]:
+            days = (snapshot[1] - previous[1]).total_seconds() / 86400
+            if days < min_days:
+                continue
+            rows.append(feature_row(*previous[2:]))
+            targets.append((math.log1p(snapshot[2]) - math.log1p(previous[2])) * HORIZON_DAYS / days)
+        previous = snapshot
+    return np.array(rows, dtype=np.float64).reshape(-1, len(FEATURES)), np.array(targets, dtype=np.float64)
+
+
+def csv_dataset(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Training samples from a CSV file
+
+    Columns: ``stars``, ``forks``, ``open_issues``,
+    ``maintainer_activity_score``, ``contribution_guide_score`` and
+    ``star_growth``, the relative star growth over the following
+    ``HORIZON_DAYS`` days (0.1 for +10%).
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        records = list(csv.DictReader(f))
+    rows = [
+        feature_row(*(float(record[name]) for name in (
+            'stars', 'forks', 'open_issues', 'maintainer_activity_score', 'contribution_guide_score'
+        )))
+        for record in records
+    ]
+    targets = [math.log1p(float(record['star_growth'])) for record in records]
+    return np.array(rows, dtype=np.float64).reshape(-1, len(FEATURES)), np.array(targets, dtype=np.float64)
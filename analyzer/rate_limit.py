@@ -0,0 +1,298 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Lower numbers are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+# GitHub asks clients to wait at least a minute after a secondary limit without Retry-After
+SECONDARY_LIMIT_BACKOFF = 60
+
+# How often asyncio callers re-check for a free token
+ASYNC_POLL_INTERVAL = 0.05
+
+
+class RateLimitExceeded(Exception):
+    """Raised when no GitHub token has budget left within the allowed wait"""
+
+    def __init__(self, reset_at: float):
+        self.reset_at = reset_at
+        reset = datetime.fromtimestamp(reset_at, tz=timezone.utc).strftime('%H:%M UTC')
+        super().__init__(f"GitHub API rate limit exceeded. Try again after {reset}.")
+
+
+def is_rate_limited(response) -> bool:
+    """Check if a GitHub response was rejected by a primary or secondary rate limit"""
+    if response.status_code == 429:
+        return True
+    if response.status_code != 403:
+        return False
+    return (
+        response.headers.get('X-RateLimit-Remaining') == '0'
+        or 'Retry-After' in response.headers
+        or 'rate limit' in response.text.lower()
+    )
+
+
+class TokenState:
+    """Budget bookkeeping for one GitHub token (``None`` means unauthenticated)"""
+
+    def __init__(self, token: Optional[str]):
+        self.token = token
+        self.limit = None
+        self.remaining = None  # Unknown until GitHub reports it
+        self.reset_at = 0.0
+        self.blocked_until = 0.0
+        self.in_flight = 0
+
+    @property
+    def label(self) -> str:
+        return f"...{self.token[-4:]}" if self.token else 'anonymous'
+
+    def available_at(self, now: float, reserve: int) -> float:
+        """Earliest time this token may be used while keeping ``reserve`` calls back"""
+        available_at = self.blocked_until
+        if self.remaining is not None and self.remaining <= reserve and now < self.reset_at:
+            available_at = max(available_at, self.reset_at)
+        return available_at
+
+    def snapshot(self) -> Dict:
+        return {
+            'token': self.label,
+            'limit': self.limit,
+            'remaining': self.remaining,
+            'reset_at': self.reset_at or None,
+            'blocked_until': self.blocked_until if self.blocked_until > time.time() else None,
+            'in_flight': self.in_flight,
+        }
+
+
+class RateLimitScheduler:
+    """Process-wide gatekeeper in front of every GitHub API call
+
+    Callers ``acquire`` a token before each request and ``release`` it with
+    the response. The scheduler tracks ``X-RateLimit-*`` headers per token,
+    backs off on secondary limits (``Retry-After``), spreads calls over a
+    pool of tokens and serves waiting callers in priority order. Batch work
+    may not dip into the last ``batch_reserve`` calls of a token so that
+    interactive analyses keep working when a large comparison is running.
+    """
+
+    def __init__(self, tokens: List[Optional[str]], max_in_flight: int = 32,
+                 batch_reserve: int = 0, max_wait: float = 10.0):
+        self.tokens = [TokenState(token) for token in (tokens or [None])]
+        self.max_in_flight = max_in_flight
+        self.batch_reserve = batch_reserve
+        self.max_wait = max_wait
+        self._in_flight = 0
+        self.requests_sent = 0
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    @property
+    def has_tokens(self) -> bool:
+        """Whether any authenticated token is configured"""
+        return any(state.token for state in self.tokens)
+
+    def _reserve_for(self, priority: int) -> int:
+        return self.batch_reserve if priority > PRIORITY_INTERACTIVE else 0
+
+    def _pick_token(self, now: float, priority: int) -> Optional[TokenState]:
+        reserve = self._reserve_for(priority)
+        candidates = []
+        for state in self.tokens:
+            if state.reset_at and now >= state.reset_at:
+                # The window rolled over; trust the next response for the new budget
+                state.remaining = state.limit
+                state.reset_at = 0.0
+            if state.available_at(now, reserve) <= now:
+                candidates.append(state)
+        if not candidates:
+            return None
+        return max(candidates, key=lambda state: (
+            float('inf') if state.remaining is None else state.remaining,
+            -state.in_flight,
+        ))
+
+    def _next_available_at(self, now: float, priority: int) -> float:
+        reserve = self._reserve_for(priority)
+        return min(state.available_at(now, reserve) for state in self.tokens)
+    
+    def next_available_at(self, priority: int = PRIORITY_INTERACTIVE) -> float:
+        """Earliest time a caller of ``priority`` could be handed a token"""
+        with self._condition:
+            return self._next_available_at(time.time(), priority)
+    
+    def budget_left(self) -> float:
+        """Fraction of the known core budget still available across all tokens (1.0 if unknown)"""
+        with self._condition:
+            known = [state for state in self.tokens if state.limit and state.remaining is not None]
+            if not known:
+                return 1.0
+            return sum(state.remaining for state in known) / sum(state.limit for state in known)
+
+    def _try_acquire(self, ticket: Tuple[int, int], priority: int,
+                     deadline: float) -> Tuple[Optional[TokenState], Optional[float]]:
+        """Hand ``ticket`` a token if it is its turn; call with the lock held
+
+        Returns the token, or ``None`` and how long to wait before trying
+        again (``None`` meaning until another caller releases a token).
+        """
+        if self._waiting[0] != ticket or self._in_flight >= self.max_in_flight:
+            return None, None
+        now = time.time()
+        state = self._pick_token(now, priority)
+        if state is not None:
+            heapq.heappop(self._waiting)
+            state.in_flight += 1
+            if state.remaining is not None:
+                state.remaining -= 1
+            self._in_flight += 1
+            self.requests_sent += 1
+            self._condition.notify_all()
+            return state, None
+        available_at = self._next_available_at(now, priority)
+        if available_at > deadline:
+            raise RateLimitExceeded(available_at)
+        return None, available_at - now
+
+    def _abandon(self, ticket: Tuple[int, int]):
+        """Drop a waiting ticket; call with the lock held"""
+        if ticket in self._waiting:
+            self._waiting.remove(ticket)
+            heapq.heapify(self._waiting)
+        self._condition.notify_all()
+
+    def acquire(self, priority: int = PRIORITY_INTERACTIVE, timeout: float = None) -> TokenState:
+        """Block until a request may be sent and return the token to send it with
+
+        Raises ``RateLimitExceeded`` when no token will have budget within
+        ``timeout`` (defaults to ``max_wait``) seconds. Waiting behind other
+        queued callers does not count against the budget wait.
+        """
+        timeout = self.max_wait if timeout is None else timeout
+        deadline = time.time() + timeout
+        ticket = (priority, next(self._sequence))
+
+        with self._condition:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    state, wait = self._try_acquire(ticket, priority, deadline)
+                    if state is not None:
+                        return state
+                    self._condition.wait(wait)
+            except BaseException:
+                self._abandon(ticket)
+                raise
+
+    async def acquire_async(self, priority: int = PRIORITY_INTERACTIVE, timeout: float = None) -> TokenState:
+        """Awaitable ``acquire`` for asyncio callers
+
+        The lock is only held briefly, so instead of blocking the event loop
+        on the condition the caller polls every ``ASYNC_POLL_INTERVAL``.
+        """
+        timeout = self.max_wait if timeout is None else timeout
+        deadline = time.time() + timeout
+        ticket = (priority, next(self._sequence))
+
+        with self._condition:
+            heapq.heappush(self._waiting, ticket)
+        try:
+            while True:
+                with self._condition:
+                    state, wait = self._try_acquire(ticket, priority, deadline)
+                if state is not None:
+                    return state
+                await asyncio.sleep(ASYNC_POLL_INTERVAL if wait is None else min(wait, ASYNC_POLL_INTERVAL))
+        except BaseException:
+            with self._condition:
+                self._abandon(ticket)
+            raise
+
+    def release(self, state: TokenState, response=None):
+        """Return a token and record the budget GitHub reported on ``response``"""
+        with self._condition:
+            state.in_flight -= 1
+            self._in_flight -= 1
+            if response is not None:
+                self._record(state, response)
+            self._condition.notify_all()
+
+    def _record(self, state: TokenState, response):
+        headers = response.headers
+        # GraphQL and search have their own budgets; only the core REST budget is tracked
+        if headers.get('X-RateLimit-Resource', 'core') != 'core' and not is_rate_limited(response):
+            return
+        try:
+            if 'X-RateLimit-Limit' in headers:
+                state.limit = int(headers['X-RateLimit-Limit'])
+            if 'X-RateLimit-Remaining' in headers:
+                state.remaining = int(headers['X-RateLimit-Remaining'])
+            if 'X-RateLimit-Reset' in headers:
+                state.reset_at = float(headers['X-RateLimit-Reset'])
+        except ValueError:
+            logger.warning(f"Malformed rate limit headers from GitHub: {dict(headers)}")
+
+        if is_rate_limited(response):
+            retry_after = headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                state.blocked_until = time.time() + int(retry_after)
+            elif state.remaining == 0 and state.reset_at:
+                state.blocked_until = state.reset_at
+            else:
+                state.blocked_until = time.time() + SECONDARY_LIMIT_BACKOFF
+            logger.warning(f"GitHub rate limit hit for token {state.label}; "
+                           f"backing off until {state.blocked_until:.0f}")
+
+    def snapshot(self) -> Dict:
+        """Describe the scheduler's current budget and queue"""
+        with self._condition:
+            queued = {}
+            for priority, _ in self._waiting:
+                name = 'interactive' if priority <= PRIORITY_INTERACTIVE else 'batch'
+                queued[name] = queued.get(name, 0) + 1
+            known = [state.remaining for state in self.tokens if state.remaining is not None]
+            return {
+                'in_flight': self._in_flight,
+                'max_in_flight': self.max_in_flight,
+                'requests_sent': self.requests_sent,
+                'batch_reserve': self.batch_reserve,
+                'queued': queued,
+                'remaining': sum(known) if known else None,
+                'tokens': [state.snapshot() for state in self.tokens],
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> RateLimitScheduler:
+    """Return the process-wide rate limit scheduler"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                tokens = []
+                for token in [settings.GITHUB_TOKEN] + settings.GITHUB_TOKENS:
+                    if token and token not in tokens:
+                        tokens.append(token)
+                _scheduler = RateLimitScheduler(
+                    tokens,
+                    max_in_flight=settings.GITHUB_RATE_LIMIT_MAX_IN_FLIGHT,
+                    batch_reserve=settings.GITHUB_RATE_LIMIT_BATCH_RESERVE,
+                    max_wait=settings.GITHUB_RATE_LIMIT_MAX_WAIT,
+                )
+    return _scheduler
@@ -0,0 +1,198 @@
+import math
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from .analysis_service import (
+    CONTRIBUTION_WEIGHTS, MAX_POPULARITY_SCORE, OVERALL_WEIGHTS, get_popularity_model, overall_score,
+    popularity_score,
+)
+from .popularity_model import feature_matrix
+
+# Columns read by score_batch; flags are booleans, avg_response_time_hours is
+# NaN (or inf) for repositories without any answered issue
+COUNT_COLUMNS = [
+    'stars', 'forks', 'watchers', 'recent_commits',
+    'commits_30_days', 'commits_7_days', 'open_issues', 'open_pulls',
+]
+FLAG_COLUMNS = list(CONTRIBUTION_WEIGHTS)
+COLUMNS = COUNT_COLUMNS + ['avg_response_time_hours'] + FLAG_COLUMNS
+
+# Result fields score_batch recomputes
+SCORE_FIELDS = ['popularity_score', 'maintainer_activity_score', 'contribution_guide_score', 'overall_score']
+
+# Scaled scores this close to a rounding boundary are rounded by the scalar code instead
+TIE_TOLERANCE = 1e-6
+
+
+def round2(values: np.ndarray, exact: Callable[[int], float]) -> np.ndarray:
+    """Round to two decimals exactly like Python's ``round(value, 2)``
+
+    ``np.rint(values * 100)`` can fall on the other side of a .5 boundary
+    than the correctly rounded decimal, so the few elements that land near
+    one are recomputed with ``exact(index)``.
+    """
+    scaled = values * 100
+    rounded = np.rint(scaled) / 100
+    for index in np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < TIE_TOLERANCE):
+        rounded[index] = exact(index)
+    return rounded
+
+
+def popularity_scores(stars: np.ndarray, forks: np.ndarray, watchers: np.ndarray) -> np.ndarray:
+    """Vectorized ``popularity_score``"""
+    score = np.log1p(stars) * 0.5 + np.log1p(forks) * 0.3 + np.log1p(watchers) * 0.2
+    return round2(
+        np.minimum(100, (score / MAX_POPULARITY_SCORE) * 100),
+        lambda i: popularity_score(stars[i], forks[i], watchers[i]),
+    )
+
+
+def activity_scores(commits_30: np.ndarray, commits_7: np.ndarray, avg_response: np.ndarray,
+                    issues: np.ndarray, pulls: np.ndarray) -> np.ndarray:
+    """Vectorized ``RepositoryAnalyzer._calculate_activity_score``"""
+    commit_score = np.minimum(50, commits_30 * 2 + commits_7 * 5)
+    # NaN and inf (no response) compare false everywhere and score 0
+    response_score = np.select([avg_response < 24, avg_response < 168, avg_response < 720], [30, 20, 10], 0)
+    engagement_score = np.minimum(20, (issues + pulls) * 0.5)
+    # Every term is a multiple of 0.5, so the sum is exact and plain rounding is safe
+    return np.minimum(100, commit_score + response_score + engagement_score)
+
+
+def contribution_scores(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    """Vectorized contribution guide score from the ``has_*`` flag columns"""
+    score = np.zeros(len(columns[FLAG_COLUMNS[0]]))
+    for name, points in CONTRIBUTION_WEIGHTS.items():
+        score += np.where(columns[name], points, 0)
+    return score
+
+
+def overall_scores(popularity: np.ndarray, activity: np.ndarray, contribution: np.ndarray,
+                   weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """Vectorized ``overall_score``"""
+    weights = weights or OVERALL_WEIGHTS
+    overall = (popularity * weights['popularity'] +
+               activity * weights['activity'] +
+               contribution * weights['contribution'])
+    return round2(overall, lambda i: overall_score(
+        float(popularity[i]), float(activity[i]), float(contribution[i]), weights
+    ))
+
+
+def growth_predictions(stars: np.ndarray, forks: np.ndarray, recent_commits: np.ndarray) -> np.ndarray:
+    """Vectorized ``RepositoryAnalyzer._predict_popularity_growth``"""
+    established = (stars > 1000) & (forks > 100)
+    known = ~established & (stars > 100)
+    emerging = ~established & ~known
+    return np.select(
+        [
+            established & (recent_commits > 20), established,
+            known & (recent_commits > 10), known,
+            emerging & (recent_commits > 5),
+        ],
+        [
+            "High growth potential - Strong community engagement and active development",
+            "Stable popularity - Well-established but may need more active development",
+            "Growing popularity - Good momentum with recent activity",
+            "Moderate growth potential - Needs more active development",
+            "Emerging popularity - Early stage with active development",
+        ],
+        "Low growth potential - Needs more community engagement and development",
+    )
+
+
+def activity_levels(commits_30: np.ndarray) -> np.ndarray:
+    """Activity level labels of ``RepositoryAnalyzer._generate_activity_analysis``"""
+    return np.select(
+        [commits_30 > 20, commits_30 > 10, commits_30 > 5, commits_30 > 0],
+        ["Very High", "High", "Moderate", "Low"],
+        "Inactive",
+    )
+
+
+def response_qualities(avg_response: np.ndarray) -> np.ndarray:
+    """Response quality labels of ``RepositoryAnalyzer._generate_activity_analysis``"""
+    return np.select(
+        [avg_response < 24, avg_response < 168, avg_response < 720],
+        ["Excellent", "Good", "Fair"],
+        "Poor",
+    )
+
+
+def score_batch(columns: Dict[str, np.ndarray], weights: Optional[Dict[str, float]] = None) -> Dict[str, np.ndarray]:
+    """Score N repositories at once from columnar metrics
+
+    ``columns`` maps every name in ``COLUMNS`` to an array of length N (see
+    ``result_columns``). Returns the sub-scores and overall score (under
+    ``weights``, ``OVERALL_WEIGHTS`` by default) as float arrays equal to
+    what the per-repository path computes, plus the category labels.
+    With a trained popularity model the growth predictions come from the
+    model, in one pass over the batch.
+    """
+    counts = {name: np.asarray(columns[name], dtype=np.float64) for name in COUNT_COLUMNS}
+    avg_response = np.asarray(columns['avg_response_time_hours'], dtype=np.float64)
+    flags = {name: np.asarray(columns[name], dtype=bool) for name in FLAG_COLUMNS}
+
+    popularity = popularity_scores(counts['stars'], counts['forks'], counts['watchers'])
+    activity = activity_scores(
+        counts['commits_30_days'], counts['commits_7_days'], avg_response,
+        counts['open_issues'], counts['open_pulls'],
+    )
+    contribution = contribution_scores(flags)
+    scores = {
+        'popularity_score': popularity,
+        'maintainer_activity_score': activity,
+        'contribution_guide_score': contribution,
+        'overall_score': overall_scores(popularity, activity, contribution, weights),
+        'popularity_prediction': growth_predictions(counts['stars'], counts['forks'], counts['recent_commits']),
+        'activity_level': activity_levels(counts['commits_30_days']),
+        'response_quality': response_qualities(avg_response),
+    }
+
+    model = get_popularity_model()
+    if model is not None:
+        growth = model.predict(feature_matrix(dict(
+            counts, maintainer_activity_score=activity, contribution_guide_score=contribution
+        )))
+        scores['predicted_star_growth'] = growth
+        scores['popularity_prediction'] = np.array([model.describe(value) for value in growth.tolist()])
+    return scores
+
+
+def result_columns(results: List[Dict]) -> Dict[str, np.ndarray]:
+    """Build ``score_batch`` columns from analysis results that carry ``metrics``"""
+    rows = [
+        (
+            result['stars'], result['forks'], result['watchers'], result['recent_commits_count'],
+            result['metrics']['commits_30_days'], result['metrics']['commits_7_days'],
+            result['metrics']['open_issues'], result['metrics']['open_pulls'],
+        )
+        for result in results
+    ]
+    counts = np.array(rows, dtype=np.float64).reshape(len(results), len(COUNT_COLUMNS))
+    columns = {name: counts[:, index] for index, name in enumerate(COUNT_COLUMNS)}
+    columns['avg_response_time_hours'] = np.array([
+        math.nan if result['metrics']['avg_response_time_hours'] is None
+        else result['metrics']['avg_response_time_hours']
+        for result in results
+    ], dtype=np.float64)
+    for name in FLAG_COLUMNS:
+        columns[name] = np.array([bool(result['metrics'][name]) for result in results], dtype=bool)
+    return columns
+
+
+def leaderboard(results: List[Dict], weights: Optional[Dict[str, float]] = None,
+                limit: Optional[int] = None) -> List[Dict]:
+    """Rescore results under ``weights`` and return them best first
+
+    Results computed before scores kept their ``metrics`` are skipped.
+    """
+    results = [result for result in results if 'metrics' in result]
+    if not results:
+        return []
+    scores = score_batch(result_columns(results), weights)
+    order = np.argsort(-scores['overall_score'], kind='stable')[:limit]
+    return [
+        dict(results[index], **{field: float(scores[field][index]) for field in SCORE_FIELDS})
+        for index in order
+    ]
@@ -0,0 +1,98 @@
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from .event_loop import detached, with_own_thread
+
+
+class _Call:
+    """One in-flight execution and its outcome"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one execution
+
+    The first caller for a key runs the function; callers arriving while it
+    is still running wait for it and receive the same result (or exception)
+    instead of repeating the work. Nothing is remembered once the call
+    returns, so this complements the cache rather than replacing it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """asyncio counterpart of ``SingleFlight``
+
+    Calls are shared across the whole process, whichever event loop the
+    callers run on: the first caller runs the work as a task on its own
+    loop and publishes the outcome through a ``concurrent.futures.Future``
+    that every caller awaits. The work runs in its own task, so a caller
+    that is cancelled (e.g. by a timeout) does not cancel it for the
+    callers still waiting. It may outlive the first caller, so it gets a
+    sync_to_async thread of its own rather than borrowing the caller's.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, concurrent.futures.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable], *args, **kwargs) -> Any:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = concurrent.futures.Future()
+                # A running future cannot be cancelled by a caller that stops waiting
+                future.set_running_or_notify_cancel()
+
+        if leader:
+            task = detached(asyncio.get_running_loop().create_task, with_own_thread(fn(*args, **kwargs)))
+            task.add_done_callback(lambda finished: self._finish(key, future, finished))
+
+        waiter = asyncio.wrap_future(future)
+        # Mark the outcome as retrieved even if this caller gave up waiting
+        waiter.add_done_callback(lambda done: done.cancelled() or done.exception())
+        return await asyncio.shield(waiter)
+
+    def _finish(self, key: Hashable, future: concurrent.futures.Future, task: asyncio.Task):
+        with self._lock:
+            del self._calls[key]
+        if task.cancelled():
+            future.set_exception(asyncio.CancelledError())
+        elif task.exception() is not None:
+            future.set_exception(task.exception())
+        else:
+            future.set_result(task.result())
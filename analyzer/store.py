@@ -0,0 +1,172 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import AnalysisHistory, RepositoryAnalysis
+
+logger = logging.getLogger(__name__)
+
+# Result fields copied onto RepositoryAnalysis and AnalysisHistory columns
+SCORE_FIELDS = ['popularity_score', 'maintainer_activity_score', 'contribution_guide_score', 'overall_score']
+METRIC_FIELDS = ['stars', 'forks', 'watchers', 'open_issues', 'open_pulls']
+TEXT_FIELDS = ['full_name', 'description', 'language', 'popularity_prediction',
+               'maintainer_activity_analysis', 'contribution_guide_analysis']
+
+# Most history rows load_history returns
+HISTORY_LIMIT = 100
+
+
+def is_enabled() -> bool:
+    """Whether the persistent analysis store is configured"""
+    return settings.ANALYSIS_STORE_ENABLED
+
+
+def store_key(owner: str, repo: str) -> Tuple[str, str]:
+    """Repositories are stored under their lowercased owner and name"""
+    return owner.lower(), repo.lower()
+
+
+def _analysis_row(result: Dict, version: int, analyzed_at: datetime) -> RepositoryAnalysis:
+    """Build the (unsaved) RepositoryAnalysis row of an analysis result"""
+    owner, repo_name = store_key(result['owner'], result['repo_name'])
+    row = RepositoryAnalysis(
+        owner=owner,
+        repo_name=repo_name,
+        recommendations='\n'.join(result.get('recommendations') or []),
+        last_commit_date=parse_datetime(result['last_commit_date']) if result.get('last_commit_date') else None,
+        result=result,
+        analysis_version=version,
+        analyzed_at=analyzed_at,
+    )
+    for field in SCORE_FIELDS:
+        setattr(row, field, float(result[field]))
+    for field in METRIC_FIELDS:
+        setattr(row, field, result.get(field) or 0)
+    for field in TEXT_FIELDS:
+        setattr(row, field, result.get(field))
+    return row
+
+
+def save_analyses(results: List[Dict], version: int) -> int:
+    """Upsert successful analysis results and append one history row for each
+
+    All rows are written in one transaction with two bulk inserts, so
+    storing a whole comparison costs the same as storing one analysis.
+    Returns the number of stored results; storage errors are logged, never
+    raised, so a broken store cannot fail an analysis.
+    """
+    results = [result for result in results if result and 'error' not in result]
+    if not is_enabled() or not results:
+        return 0
+
+    analyzed_at = timezone.now()
+    rows = {}
+    for result in results:
+        row = _analysis_row(result, version, analyzed_at)
+        rows[(row.owner, row.repo_name)] = row
+
+    update_fields = (
+        SCORE_FIELDS + METRIC_FIELDS + TEXT_FIELDS +
+        ['recommendations', 'last_commit_date', 'result', 'analysis_version', 'analyzed_at', 'updated_at']
+    )
+    try:
+        with transaction.atomic():
+            RepositoryAnalysis.objects.bulk_create(
+                rows.values(), update_conflicts=True,
+                unique_fields=['owner', 'repo_name'], update_fields=update_fields,
+            )
+            lookup = Q()
+            for owner, repo_name in rows:
+                lookup |= Q(owner=owner, repo_name=repo_name)
+            ids = {
+                (owner, repo_name): pk
+                for pk, owner, repo_name in RepositoryAnalysis.objects.filter(lookup).values_list(
+                    'pk', 'owner', 'repo_name'
+                )
+            }
+            AnalysisHistory.objects.bulk_create([
+                AnalysisHistory(
+                    repository_id=ids[key],
+                    stars=row.stars,
+                    forks=row.forks,
+                    open_issues=row.open_issues,
+                    popularity_score=row.popularity_score,
+                    maintainer_activity_score=row.maintainer_activity_score,
+                    contribution_guide_score=row.contribution_guide_score,
+                    overall_score=row.overall_score,
+                    analyzed_at=analyzed_at,
+                )
+                for key, row in rows.items()
+            ])
+    except DatabaseError as e:
+        logger.error(f"Could not store {len(rows)} analyses: {e}")
+        return 0
+    return len(rows)
+
+
+def load_analysis(owner: str, repo: str, version: int, max_age: int) -> Optional[Tuple[Dict, datetime]]:
+    """Return the stored result of a repository and when it was computed
+
+    Results of another scoring ``version`` or older than ``max_age``
+    seconds are ignored.
+    """
+    if not is_enabled():
+        return None
+    owner, repo_name = store_key(owner, repo)
+    try:
+        row = RepositoryAnalysis.objects.filter(
+            owner=owner, repo_name=repo_name, analysis_version=version,
+            analyzed_at__gte=timezone.now() - timedelta(seconds=max_age),
+        ).only('result', 'analyzed_at').first()
+    except DatabaseError as e:
+        logger.error(f"Could not read stored analysis of {owner}/{repo_name}: {e}")
+        return None
+    if row is None or not row.result:
+        return None
+    return row.result, row.analyzed_at
+
+
+def load_results(version: int) -> List[Dict]:
+    """Return every stored result of scoring ``version``"""
+    if not is_enabled():
+        return []
+    try:
+        return [
+            result for result in RepositoryAnalysis.objects.filter(analysis_version=version)
+            .values_list('result', flat=True).iterator() if result
+        ]
+    except DatabaseError as e:
+        logger.error(f"Could not read stored analyses: {e}")
+        return []
+
+
+def load_history(owner: str, repo: str, limit: int = HISTORY_LIMIT) -> List[Dict]:
+    """Return the most recent scores of a repository, newest first"""
+    if not is_enabled():
+        return []
+    owner, repo_name = store_key(owner, repo)
+    try:
+        return list(
+            AnalysisHistory.objects.filter(repository__owner=owner, repository__repo_name=repo_name)
+            .values('analyzed_at', 'stars', 'forks', 'open_issues', *SCORE_FIELDS)[:limit]
+        )
+    except DatabaseError as e:
+        logger.error(f"Could not read analysis history of {owner}/{repo_name}: {e}")
+        return []
+
+
+def count_analyses() -> int:
+    """Number of repositories in the store"""
+    if not is_enabled():
+        return 0
+    try:
+        return RepositoryAnalysis.objects.count()
+    except DatabaseError as e:
+        logger.error(f"Could not count stored analyses: {e}")
+        return 0
@@ -10,4 +10,9 @@ urlpatterns = [
     path('about/', views.about, name='about'),
     path('api/docs/', views.api_docs, name='api_docs'),
     path('api/analyze/', views.api_analyze_repository, name='api_analyze_repository'),
+    path('api/analyze/batch/', views.api_analyze_batch, name='api_analyze_batch'),
+    path('api/jobs/', views.api_submit_job, name='api_submit_job'),
+    path('api/jobs/<str:job_id>/', views.api_job, name='api_job'),
+    path('api/history/<str:owner>/<str:repo>/', views.api_history, name='api_history'),
+    path('api/rate-limit/', views.api_rate_limit, name='api_rate_limit'),
 ] 
\ No newline at end of file
@@ -1,16 +1,45 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
+import asyncio
 import json
 import logging
 
 from .forms import RepositoryAnalysisForm, ComparisonForm
-from .analysis_service import RepositoryAnalyzer
+from . import event_loop, jobs, store
+from .analysis_service import (
+    REASON_FORBIDDEN, REASON_NOT_FOUND, REASON_RATE_LIMITED, REASON_UNAVAILABLE, get_analyzer,
+)
+from .rate_limit import PRIORITY_BATCH, get_scheduler
 
 logger = logging.getLogger(__name__)
 
+# HTTP status of a failed analysis, by the ``reason`` it failed (anything else is a 500)
+ERROR_STATUS_CODES = {
+    REASON_NOT_FOUND: 404,
+    REASON_FORBIDDEN: 403,
+    REASON_RATE_LIMITED: 429,
+    REASON_UNAVAILABLE: 503,
+}
+
+
+async def run_pipeline(request, coroutine):
+    """Await a coroutine of the async analysis pipeline
+    
+    Under ASGI it runs on the server's event loop, so an in-flight analysis
+    holds no thread. Under WSGI Django gives each async view a throwaway
+    loop, so the work goes to the process-wide loop instead (see
+    ``event_loop``), whose pooled connections outlive the request.
+    """
+    if isinstance(request, ASGIRequest):
+        return await coroutine
+    return await asyncio.wrap_future(event_loop.submit(coroutine))
+
 
 def index(request):
     """Home page with analysis form"""
@@ -19,27 +48,27 @@ def index(request):
         if form.is_valid():
             owner = form.cleaned_data['owner']
             repo = form.cleaned_data['repo']
-            return redirect('analyze_repository', owner=owner, repo=repo)
+            return redirect('analyzer:analyze_repository', owner=owner, repo=repo)
     else:
         form = RepositoryAnalysisForm()
     
     context = {
         'form': form,
-        'total_analyses': 0  # No database tracking
+        'total_analyses': store.count_analyses()  # 0 unless the analysis store is enabled
     }
     return render(request, 'analyzer/index.html', context)
 
 
-def analyze_repository(request, owner, repo):
+async def analyze_repository(request, owner, repo):
     """Analyze a specific repository in real-time"""
     try:
         # Perform real-time analysis
-        analyzer = RepositoryAnalyzer()
-        analysis_data = analyzer.analyze_repository(owner, repo)
+        analyzer = get_analyzer()
+        analysis_data = await run_pipeline(request, analyzer.aanalyze_repository(owner, repo))
         
         if 'error' in analysis_data:
             messages.error(request, analysis_data['error'])
-            return redirect('index')
+            return redirect('analyzer:index')
         
         context = {
             'analysis': analysis_data,
@@ -51,10 +80,10 @@ def analyze_repository(request, owner, repo):
     except Exception as e:
         logger.error(f"Error analyzing repository {owner}/{repo}: {e}")
         messages.error(request, f'Analysis failed: {str(e)}')
-        return redirect('index')
+        return redirect('analyzer:index')
 
 
-def compare_repositories(request):
+async def compare_repositories(request):
     """Compare multiple repositories in real-time"""
     if request.method == 'POST':
         form = ComparisonForm(request.POST)
@@ -62,20 +91,20 @@ def compare_repositories(request):
             repositories = form.cleaned_data['repositories']
             comparison_type = form.cleaned_data['comparison_type']
             
-            analyzer = RepositoryAnalyzer()
-            comparison_data = []
-            
-            for repo_info in repositories:
-                analysis = analyzer.analyze_repository(repo_info['owner'], repo_info['repo'])
-                if 'error' not in analysis:
-                    comparison_data.append(analysis)
+            analyzer = get_analyzer(PRIORITY_BATCH)
+            results = await run_pipeline(request, analyzer.acompare_repositories(
+                [(repo_info['owner'], repo_info['repo']) for repo_info in repositories]
+            ))
+            comparison_data = [result['analysis'] for result in results if result['status'] == 'ok']
+            failed_repositories = [result for result in results if result['status'] != 'ok']
             
             if len(comparison_data) < 2:
                 messages.error(request, 'Could not analyze enough repositories for comparison')
-                return redirect('compare_repositories')
+                return redirect('analyzer:compare_repositories')
             
             context = {
                 'comparison_data': comparison_data,
+                'failed_repositories': failed_repositories,
                 'comparison_type': comparison_type,
                 'repositories': repositories
             }
@@ -89,7 +118,7 @@ def compare_repositories(request):
 
 @csrf_exempt
 @require_http_methods(["POST"])
-def api_analyze_repository(request):
+async def api_analyze_repository(request):
     """API endpoint for repository analysis"""
     try:
         data = json.loads(request.body)
@@ -99,10 +128,14 @@ def api_analyze_repository(request):
         if not owner or not repo:
             return JsonResponse({'error': 'Owner and repo parameters are required'}, status=400)
         
-        analyzer = RepositoryAnalyzer()
-        analysis_data = analyzer.analyze_repository(owner, repo)
+        analyzer = get_analyzer()
+        analysis_data = await run_pipeline(request, analyzer.aanalyze_repository(owner, repo))
         
-        return JsonResponse(analysis_data)
+        if 'error' in analysis_data:
+            status = ERROR_STATUS_CODES.get(analysis_data.get('reason'), 500)
+        else:
+            status = 200
+        return JsonResponse(analysis_data, status=status)
         
     except json.JSONDecodeError:
         return JsonResponse({'error': 'Invalid JSON'}, status=400)
@@ -111,6 +144,114 @@ def api_analyze_repository(request):
         return JsonResponse({'error': str(e)}, status=500)
 
 
+def batch_repositories(data) -> list:
+    """Read the ``repositories`` of a batch request: ``{"owner", "repo"}`` objects or ``"owner/repo"`` strings"""
+    if not isinstance(data, dict) or not isinstance(data.get('repositories'), list):
+        raise ValueError('A "repositories" list is required')
+    repositories = []
+    for item in data['repositories']:
+        if isinstance(item, dict):
+            owner, repo = item.get('owner'), item.get('repo')
+        elif isinstance(item, str) and item.count('/') == 1:
+            owner, repo = item.split('/')
+        else:
+            owner = repo = None
+        if not isinstance(owner, str) or not isinstance(repo, str) or not owner or not repo:
+            raise ValueError(f'Invalid repository: {item!r}')
+        repositories.append((owner, repo))
+    if not repositories:
+        raise ValueError('At least one repository is required')
+    if len(repositories) > settings.ANALYZER_BATCH_MAX_REPOSITORIES:
+        raise ValueError(f'At most {settings.ANALYZER_BATCH_MAX_REPOSITORIES} repositories can be analyzed per batch')
+    return repositories
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def api_analyze_batch(request):
+    """API endpoint analyzing many repositories, streaming one JSON line per repository as it finishes
+    
+    Under ASGI the lines are streamed from the server's event loop; under
+    WSGI, which can only stream synchronous iterators, the analyses run on
+    the process-wide loop and each line is handed over as it finishes.
+    """
+    try:
+        repositories = batch_repositories(json.loads(request.body))
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    analyzer = get_analyzer(PRIORITY_BATCH)
+    
+    async def lines():
+        async for entry in analyzer.astream_analyses(repositories):
+            yield json.dumps(entry, cls=DjangoJSONEncoder) + '\n'
+    
+    content = lines() if isinstance(request, ASGIRequest) else event_loop.iterate(lines())
+    response = StreamingHttpResponse(content, content_type='application/x-ndjson')
+    # Ask proxies not to buffer, so each line reaches the client when it is ready
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def api_submit_job(request):
+    """API endpoint queueing an analysis or comparison job to be polled for later"""
+    try:
+        data = json.loads(request.body)
+        kind = data.get('kind', jobs.JOB_ANALYSIS) if isinstance(data, dict) else None
+        if kind == jobs.JOB_ANALYSIS:
+            owner = data.get('owner')
+            repo = data.get('repo')
+            if not owner or not repo:
+                return JsonResponse({'error': 'Owner and repo parameters are required'}, status=400)
+            repositories = [(owner, repo)]
+        elif kind == jobs.JOB_COMPARISON:
+            repositories = batch_repositories(data)
+        else:
+            return JsonResponse({'error': f'"kind" must be one of {", ".join(jobs.JOB_KINDS)}'}, status=400)
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    job = jobs.submit_job(kind, repositories)
+    response = JsonResponse(job, status=202)
+    response['Location'] = f"{request.path.rstrip('/')}/{job['id']}/"
+    return response
+
+
+@require_http_methods(["GET"])
+def api_job(request, job_id):
+    """API endpoint reporting a job's status, progress and, once finished, result"""
+    job = jobs.get_job(job_id)
+    if job is None:
+        return JsonResponse({'error': 'Job not found or expired'}, status=404)
+    return JsonResponse(job)
+
+
+@require_http_methods(["GET"])
+def api_history(request, owner, repo):
+    """API endpoint listing a repository's stored scores over time, newest first"""
+    if not store.is_enabled():
+        return JsonResponse({'error': 'Analysis history is not enabled on this server'}, status=404)
+    try:
+        limit = int(request.GET.get('limit', store.HISTORY_LIMIT))
+    except ValueError:
+        return JsonResponse({'error': '"limit" must be a number'}, status=400)
+    
+    history = store.load_history(owner, repo, max(1, min(limit, store.HISTORY_LIMIT)))
+    return JsonResponse({'owner': owner, 'repo': repo, 'history': history})
+
+
+@require_http_methods(["GET"])
+def api_rate_limit(request):
+    """API endpoint describing the GitHub rate limit scheduler state"""
+    return JsonResponse(get_scheduler().snapshot())
+
+
 def about(request):
     """About page"""
     return render(request, 'analyzer/about.html')
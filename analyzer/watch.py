@@ -0,0 +1,239 @@
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, List, Tuple
+
+from django.conf import settings
+
+from .analysis_service import dedupe_repositories, get_analyzer, recall_result
+from .rate_limit import PRIORITY_BATCH, get_scheduler
+
+logger = logging.getLogger(__name__)
+
+# Requests assumed per refresh until the refresher has measured its own average
+INITIAL_REFRESH_COST = 15
+
+# Below this share of budget left, intervals are stretched, up to MAX_BUDGET_STRETCH times
+LOW_BUDGET = 0.5
+MAX_BUDGET_STRETCH = 8
+
+# Longest the refresher sleeps between checks for due repositories
+MAX_IDLE_WAIT = 60.0
+
+BUDGET_WINDOW = 3600
+
+
+def parse_watchlist(lines: Iterable[str]) -> List[Tuple[str, str]]:
+    """Read ``owner/repo`` names or GitHub URLs, one per line
+
+    Blank lines and ``#`` comments are ignored, as are repeated repositories.
+    """
+    repositories = []
+    for number, line in enumerate(lines, 1):
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        path = line.split('github.com/')[-1].strip('/')
+        parts = path.split('/')
+        if len(parts) < 2 or not parts[0] or not parts[1]:
+            logger.warning(f"Ignoring watchlist line {number}: {line!r} is not owner/repo")
+            continue
+        owner, repo = parts[0], parts[1]
+        if repo.endswith('.git'):
+            repo = repo[:-4]
+        repositories.append((owner, repo))
+    return dedupe_repositories(repositories)
+
+
+def load_watchlist(path: str) -> List[Tuple[str, str]]:
+    """Read the watchlist file at ``path``"""
+    with open(path, encoding='utf-8') as f:
+        return parse_watchlist(f)
+
+
+def refresh_interval(activity_score: float, budget_left: float = 1.0) -> float:
+    """Seconds until a repository with ``activity_score`` (0-100) is refreshed again
+
+    Intervals run geometrically from ``ANALYZER_REFRESH_MAX_INTERVAL`` for a
+    dormant repository to ``ANALYZER_REFRESH_MIN_INTERVAL`` for the busiest,
+    and are stretched when less than half of the API budget is left.
+    """
+    shortest = settings.ANALYZER_REFRESH_MIN_INTERVAL
+    longest = max(shortest, settings.ANALYZER_REFRESH_MAX_INTERVAL)
+    activity = min(100.0, max(0.0, activity_score or 0.0)) / 100
+    interval = longest * (shortest / longest) ** activity if longest else 0
+
+    if budget_left < LOW_BUDGET:
+        shortage = (LOW_BUDGET - max(0.0, budget_left)) / LOW_BUDGET
+        interval *= 1 + shortage * (MAX_BUDGET_STRETCH - 1)
+    return min(interval, longest)
+
+
+class RequestBudget:
+    """GitHub requests the refresher has spent over the last hour"""
+
+    def __init__(self, per_hour: int):
+        self.per_hour = per_hour
+        self._spent = deque()  # (time, requests)
+        self._used = 0
+
+    def _expire(self, now: float):
+        while self._spent and self._spent[0][0] <= now - BUDGET_WINDOW:
+            self._used -= self._spent.popleft()[1]
+
+    def spend(self, requests: int, now: float = None):
+        if requests > 0:
+            self._spent.append((now or time.time(), requests))
+            self._used += requests
+
+    def remaining(self, now: float = None) -> int:
+        self._expire(now or time.time())
+        return self.per_hour - self._used
+
+    def fraction_left(self, now: float = None) -> float:
+        if self.per_hour <= 0:
+            return 0.0
+        return max(0.0, self.remaining(now) / self.per_hour)
+
+    def available_in(self, requests: int, now: float = None) -> float:
+        """Seconds until ``requests`` more requests fit in the window"""
+        now = now or time.time()
+        missing = requests - self.remaining(now)
+        if missing <= 0:
+            return 0.0
+        for spent_at, spent in self._spent:
+            missing -= spent
+            if missing <= 0:
+                return max(0.0, spent_at + BUDGET_WINDOW - now)
+        return float('inf')
+
+
+class WatchScheduler:
+    """Keep the analyses of a fixed set of repositories fresh
+
+    Each repository is due again after ``refresh_interval`` of its maintainer
+    activity score, so busy repositories are refreshed often and quiet ones
+    rarely. Refreshes go through ``RepositoryAnalyzer.refresh_repository`` at
+    batch priority (interactive requests keep their reserve), are written to
+    the result cache and analysis store, and are only started while the
+    last hour's requests leave room in ``budget_per_hour``. A rate-limited
+    refresh pauses the refresher until GitHub's budget resets.
+    """
+
+    def __init__(self, repositories: List[Tuple[str, str]], budget_per_hour: int = None,
+                 concurrency: int = None):
+        self.repositories = dedupe_repositories(repositories)
+        self.budget = RequestBudget(
+            settings.ANALYZER_REFRESH_BUDGET if budget_per_hour is None else budget_per_hour
+        )
+        self.concurrency = max(1, concurrency or settings.ANALYZER_REFRESH_CONCURRENCY)
+        self.scheduler = get_scheduler()
+        self.analyzer = get_analyzer(PRIORITY_BATCH)
+        self.paused_until = 0.0
+        self.stats = {'refreshed': 0, 'failed': 0, 'rate_limited': 0, 'requests': 0}
+        self._queue = []
+        self._sequence = itertools.count()
+        self._requests_seen = self.scheduler.requests_sent
+
+    def _push(self, due: float, owner: str, repo: str):
+        heapq.heappush(self._queue, (due, next(self._sequence), owner, repo))
+
+    def _budget_left(self) -> float:
+        return min(self.budget.fraction_left(), self.scheduler.budget_left())
+
+    def _next_due(self, result: Dict, computed_at: float) -> float:
+        return computed_at + refresh_interval(result.get('maintainer_activity_score', 0), self._budget_left())
+
+    def seed(self, now: float = None):
+        """Queue every repository, due when its remembered result goes out of date"""
+        now = now or time.time()
+        self._queue = []
+        for owner, repo in self.repositories:
+            entry = recall_result(owner, repo)
+            due = now if entry is None else self._next_due(entry['result'], entry['computed_at'])
+            self._push(due, owner, repo)
+
+    @property
+    def refresh_cost(self) -> float:
+        """Average requests spent per refresh so far, never more than the hourly budget"""
+        finished = self.stats['refreshed'] + self.stats['failed']
+        if not finished or not self.stats['requests']:
+            cost = INITIAL_REFRESH_COST
+        else:
+            cost = self.stats['requests'] / finished
+        return min(cost, self.budget.per_hour)
+
+    def _account(self):
+        """Charge the requests sent since the last check to the budget"""
+        sent = self.scheduler.requests_sent
+        self.budget.spend(sent - self._requests_seen)
+        self.stats['requests'] += sent - self._requests_seen
+        self._requests_seen = sent
+
+    def _finish(self, owner: str, repo: str, result: Dict):
+        now = time.time()
+        if result.get('rate_limited'):
+            self.stats['rate_limited'] += 1
+            self.paused_until = max(self.paused_until, self.scheduler.next_available_at(PRIORITY_BATCH), now)
+            logger.warning(f"Rate limited refreshing {owner}/{repo}; pausing refreshes "
+                           f"for {self.paused_until - now:.0f}s")
+            self._push(self.paused_until, owner, repo)
+        elif 'error' in result:
+            self.stats['failed'] += 1
+            logger.warning(f"Could not refresh {owner}/{repo}: {result['error']}")
+            self._push(now + settings.ANALYZER_REFRESH_MAX_INTERVAL, owner, repo)
+        else:
+            self.stats['refreshed'] += 1
+            due = self._next_due(result, now)
+            logger.info(f"Refreshed {owner}/{repo} (activity {result['maintainer_activity_score']}); "
+                        f"next refresh in {due - now:.0f}s")
+            self._push(due, owner, repo)
+
+    def _wait_time(self, now: float, busy: bool) -> float:
+        """How long to sleep before something may be started"""
+        if not self._queue:
+            return MAX_IDLE_WAIT
+        if busy:
+            return max(0.0, min(self._queue[0][0] - now, MAX_IDLE_WAIT))
+        waits = [self._queue[0][0] - now, self.paused_until - now, self.budget.available_in(self.refresh_cost, now)]
+        return min(MAX_IDLE_WAIT, max(0.0, max(waits)))
+
+    def run(self, once: bool = False) -> Dict:
+        """Refresh repositories as they fall due until interrupted
+
+        With ``once``, only the repositories due at start are refreshed and
+        the method returns when they are done. Returns the refresh counters.
+        """
+        self.seed()
+        started = time.time()
+        pending = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='watch-refresh') as executor:
+            try:
+                while True:
+                    self._account()
+                    now = time.time()
+                    while (self._queue and len(pending) < self.concurrency
+                           and self._queue[0][0] <= now and not (once and self._queue[0][0] > started)
+                           and now >= self.paused_until
+                           and self.budget.remaining(now) >= self.refresh_cost):
+                        _, _, owner, repo = heapq.heappop(self._queue)
+                        pending[executor.submit(self.analyzer.refresh_repository, owner, repo)] = (owner, repo)
+
+                    if once and not pending and (not self._queue or self._queue[0][0] > started):
+                        break
+                    timeout = self._wait_time(now, busy=len(pending) >= self.concurrency)
+                    if pending:
+                        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            owner, repo = pending.pop(future)
+                            self._finish(owner, repo, future.result())
+                    else:
+                        time.sleep(timeout)
+            finally:
+                for future in pending:
+                    future.cancel()
+                self._account()
+        return self.stats
@@ -50,6 +50,9 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# There are no sessions (and no database by default), so flash messages travel in a cookie
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
 ROOT_URLCONF = 'github_analyzer.urls'
 
 TEMPLATES = [
@@ -69,8 +72,18 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'github_analyzer.wsgi.application'
 
-# Database - Not needed for real-time analysis
+# Database - Not needed for real-time analysis. The optional analysis store keeps
+# results and their history in SQLite; create its tables once with
+# `django-admin migrate --settings=github_analyzer.settings`
+ANALYSIS_STORE_ENABLED = os.getenv('ANALYSIS_STORE_ENABLED', 'False').lower() == 'true'
+ANALYSIS_STORE_PATH = os.getenv('ANALYSIS_STORE_PATH', str(BASE_DIR / 'db.sqlite3'))
+
 DATABASES = {}
+if ANALYSIS_STORE_ENABLED:
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ANALYSIS_STORE_PATH,
+    }
 
 # Password validation - Not needed without auth
 AUTH_PASSWORD_VALIDATORS = []
@@ -104,15 +117,122 @@ CRISPY_TEMPLATE_PACK = "bootstrap5"
 
 # GitHub API Configuration
 GITHUB_TOKEN = os.getenv('GITHUB_TOKEN', '')
+# Optional extra tokens (comma separated) to spread load across
+GITHUB_TOKENS = [token.strip() for token in os.getenv('GITHUB_TOKENS', '').split(',') if token.strip()]
 GITHUB_API_BASE_URL = 'https://api.github.com'
 
+# 'rest' (default) or 'graphql'; GraphQL loads a repository profile in one query
+# but needs a token, and falls back to REST without one
+GITHUB_API_BACKEND = os.getenv('GITHUB_API_BACKEND', 'rest').lower()
+# Repositories fetched per GraphQL query when comparing
+GITHUB_GRAPHQL_BATCH_SIZE = int(os.getenv('GITHUB_GRAPHQL_BATCH_SIZE', '5'))
+
+# GitHub HTTP connection pool (shared by every GitHubAPIService in the process)
+GITHUB_API_POOL_CONNECTIONS = int(os.getenv('GITHUB_API_POOL_CONNECTIONS', '4'))
+GITHUB_API_POOL_SIZE = int(os.getenv('GITHUB_API_POOL_SIZE', '32'))
+GITHUB_API_MAX_RETRIES = int(os.getenv('GITHUB_API_MAX_RETRIES', '3'))
+GITHUB_API_BACKOFF_FACTOR = float(os.getenv('GITHUB_API_BACKOFF_FACTOR', '0.5'))
+GITHUB_API_CONNECT_TIMEOUT = float(os.getenv('GITHUB_API_CONNECT_TIMEOUT', '3.05'))
+GITHUB_API_READ_TIMEOUT = float(os.getenv('GITHUB_API_READ_TIMEOUT', '15'))
+
+# Maximum number of GitHub calls issued concurrently by a single fan-out
+GITHUB_API_MAX_CONCURRENCY = int(os.getenv('GITHUB_API_MAX_CONCURRENCY', '8'))
+
+# GitHub response cache: entries are served as-is for GITHUB_API_CACHE_TTL seconds,
+# then revalidated with ETag/Last-Modified for up to GITHUB_API_CACHE_RETENTION seconds
+GITHUB_API_CACHE_TTL = int(os.getenv('GITHUB_API_CACHE_TTL', '300'))
+GITHUB_API_CACHE_RETENTION = int(os.getenv('GITHUB_API_CACHE_RETENTION', '86400'))
+# Not-found answers (missing files, repositories) are remembered for this many seconds
+GITHUB_API_NEGATIVE_CACHE_TTL = int(os.getenv('GITHUB_API_NEGATIVE_CACHE_TTL', '600'))
+# Statistics GitHub is still computing (202 Accepted) are polled in the background,
+# first after GITHUB_STATS_POLL_INTERVAL seconds and then with doubling delays
+GITHUB_STATS_POLL_INTERVAL = float(os.getenv('GITHUB_STATS_POLL_INTERVAL', '2'))
+GITHUB_STATS_POLL_ATTEMPTS = int(os.getenv('GITHUB_STATS_POLL_ATTEMPTS', '6'))
+
+# Rate limit scheduler: cap on in-flight calls, calls per token held back for
+# interactive requests, and how long a caller may wait for budget to free up
+GITHUB_RATE_LIMIT_MAX_IN_FLIGHT = int(os.getenv('GITHUB_RATE_LIMIT_MAX_IN_FLIGHT', '32'))
+GITHUB_RATE_LIMIT_BATCH_RESERVE = int(os.getenv('GITHUB_RATE_LIMIT_BATCH_RESERVE', '100'))
+GITHUB_RATE_LIMIT_MAX_WAIT = float(os.getenv('GITHUB_RATE_LIMIT_MAX_WAIT', '10'))
+
+# Number of repository path indexes (keyed by git tree SHA) kept in memory
+GITHUB_TREE_INDEX_CACHE_SIZE = int(os.getenv('GITHUB_TREE_INDEX_CACHE_SIZE', '256'))
+
+# Number of open issues sampled for first-response latency
+ANALYZER_RESPONSE_SAMPLE_SIZE = int(os.getenv('ANALYZER_RESPONSE_SAMPLE_SIZE', '10'))
+
+# Repository snapshots are refreshed incrementally, and rebuilt from scratch once
+# they are ANALYZER_SNAPSHOT_MAX_AGE seconds old
+ANALYZER_SNAPSHOT_MAX_AGE = int(os.getenv('ANALYZER_SNAPSHOT_MAX_AGE', '86400'))
+
+# Analysis results are served as-is for ANALYZER_RESULT_SOFT_TTL seconds, then served
+# while a background refresh runs, and dropped after ANALYZER_RESULT_HARD_TTL seconds
+ANALYZER_RESULT_SOFT_TTL = int(os.getenv('ANALYZER_RESULT_SOFT_TTL', '600'))
+ANALYZER_RESULT_HARD_TTL = int(os.getenv('ANALYZER_RESULT_HARD_TTL', '86400'))
+
+# Repository comparisons: shared deadline (seconds) and concurrent GitHub requests
+ANALYZER_COMPARISON_TIMEOUT = float(os.getenv('ANALYZER_COMPARISON_TIMEOUT', '20'))
+ANALYZER_COMPARISON_MAX_IN_FLIGHT = int(os.getenv('ANALYZER_COMPARISON_MAX_IN_FLIGHT', '16'))
+
+# Batch analysis API: largest batch accepted and repositories analyzed at once
+# (batches share the comparison cap on concurrent GitHub requests)
+ANALYZER_BATCH_MAX_REPOSITORIES = int(os.getenv('ANALYZER_BATCH_MAX_REPOSITORIES', '1000'))
+ANALYZER_BATCH_CONCURRENCY = int(os.getenv('ANALYZER_BATCH_CONCURRENCY', '16'))
+
+# Job API: worker threads per process, seconds a job (and its result) is kept after
+# its last update, and seconds each repository of a comparison job may take
+ANALYZER_JOB_WORKERS = int(os.getenv('ANALYZER_JOB_WORKERS', '4'))
+ANALYZER_JOB_TTL = int(os.getenv('ANALYZER_JOB_TTL', '3600'))
+ANALYZER_JOB_TIMEOUT = float(os.getenv('ANALYZER_JOB_TIMEOUT', '120'))
+
+# Watched repositories (refresh_watched command): a file of owner/repo lines, the
+# range of refresh intervals (seconds) from busiest to quietest repository, the
+# GitHub requests the refresher may spend per hour, and its concurrent analyses
+ANALYZER_WATCHLIST = os.getenv('ANALYZER_WATCHLIST', str(BASE_DIR / 'watchlist.txt'))
+ANALYZER_REFRESH_MIN_INTERVAL = int(os.getenv('ANALYZER_REFRESH_MIN_INTERVAL', '900'))
+ANALYZER_REFRESH_MAX_INTERVAL = int(os.getenv('ANALYZER_REFRESH_MAX_INTERVAL', '86400'))
+ANALYZER_REFRESH_BUDGET = int(os.getenv('ANALYZER_REFRESH_BUDGET', '2000'))
+ANALYZER_REFRESH_CONCURRENCY = int(os.getenv('ANALYZER_REFRESH_CONCURRENCY', '4'))
+
+# Trained popularity-growth models (train_popularity_model command), one numbered
+# directory per version; the newest is used when any exists
+POPULARITY_MODEL_PATH = os.getenv('POPULARITY_MODEL_PATH', str(BASE_DIR / 'models' / 'popularity'))
+
 # Cache configuration
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+# CACHE_URL selects a backend shared by every worker: redis://host:6379/0 (or
+# rediss://) for Redis-compatible servers, file:///path/to/dir for a shared
+# directory. Without it each process uses its own in-memory cache, which is
+# also what tests and local development run against.
+CACHE_URL = os.getenv('CACHE_URL', '')
+# GitHub responses are cut down to the fields the analysis reads before they are
+# cached (a few KB per page), so the in-memory and file caches can hold many of them
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '20000'))
+
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+            'KEY_PREFIX': 'repopulse',
+        }
+    }
+elif CACHE_URL.startswith('file://'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': CACHE_URL[len('file://'):],
+            'KEY_PREFIX': 'repopulse',
+            'OPTIONS': {'MAX_ENTRIES': CACHE_MAX_ENTRIES},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'unique-snowflake',
+            'OPTIONS': {'MAX_ENTRIES': CACHE_MAX_ENTRIES},
+        }
     }
-}
 
 # Security settings for production
 if not DEBUG:
@@ -7,10 +7,13 @@ from django.conf import settings
 from django.conf.urls.static import static
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('', include('analyzer.urls')),
 ]
 
+# The admin (and the stored analyses it manages) is only available when installed
+if 'django.contrib.admin' in settings.INSTALLED_APPS:
+    urlpatterns.insert(0, path('admin/', admin.site.urls))
+
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT) 
\ No newline at end of file